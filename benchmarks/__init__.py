@@ -0,0 +1,49 @@
+"""
+Замеры производительности yatube.
+
+Запуск из корня проекта: python -m benchmarks.<модуль> --help.
+Каждый замер работает на отдельной тестовой базе и не трогает db.sqlite3.
+"""
+import os
+import statistics
+import time
+from contextlib import contextmanager
+
+
+def setup():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+    import django
+    django.setup()
+
+
+@contextmanager
+def test_database(verbosity=0):
+    from django.db import connection
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=verbosity)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity)
+
+
+def timed(func, repeat, before=None):
+    """Длительности repeat вызовов func в миллисекундах."""
+    timings = []
+    for _ in range(repeat):
+        if before is not None:
+            before()
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def median(timings):
+    return statistics.median(timings)
+
+
+def percentile(timings, percent):
+    """Перцентиль по отсортированному списку, ближайший ранг."""
+    rank = max(int(round(percent / 100 * len(timings) + 0.5)) - 1, 0)
+    return timings[min(rank, len(timings) - 1)]
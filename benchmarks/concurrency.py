@@ -0,0 +1,157 @@
+"""
+Пропускная способность страниц при одновременных клиентах: WSGI и ASGI.
+
+WSGI - --clients потоков, каждый обращается к WSGIHandler, как потоковый
+WSGI-сервер. ASGI - столько же клиентов-сопрограмм в одном
+цикле событий над yatube.asgi.WsgiToAsgi с пулом из --threads потоков.
+Обе схемы получают одинаковый список запросов; страницы открываются
+от имени пользователя, мимо кэша лент.
+"""
+import argparse
+import asyncio
+import random
+import threading
+import time
+
+from benchmarks import percentile, setup, test_database
+from benchmarks.endpoints import Driver, scenarios
+
+
+ENDPOINTS = ('index', 'group', 'profile', 'post')
+
+
+def run_wsgi(driver, requests, clients):
+    from django.db import connections
+
+    timings, errors = [], []
+    pending = iter(requests)
+    lock = threading.Lock()
+
+    def client():
+        try:
+            while True:
+                with lock:
+                    request = next(pending, None)
+                if request is None:
+                    return
+                method, path, data = request
+                start = time.perf_counter()
+                status = driver.request(method, path, data)
+                if status != 200:
+                    errors.append(f'WSGI {path}: ответ {status}')
+                    return
+                timings.append((time.perf_counter() - start) * 1000)
+        finally:
+            connections.close_all()
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise SystemExit(errors[0])
+    return timings
+
+
+async def asgi_request(app, path, cookie):
+    sent = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b''}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {'type': 'http', 'method': 'GET', 'path': path,
+             'query_string': b'',
+             'headers': [(b'host', b'testserver'),
+                         (b'cookie', cookie.encode())]}
+    await app(scope, receive, send)
+    return sent[0]['status']
+
+
+def run_asgi(app, cookie, requests, clients):
+    timings = []
+    pending = iter(requests)
+
+    async def client():
+        for _, path, _ in pending:
+            start = time.perf_counter()
+            status = await asgi_request(app, path, cookie)
+            if status != 200:
+                raise SystemExit(f'ASGI {path}: ответ {status}')
+            timings.append((time.perf_counter() - start) * 1000)
+
+    async def main():
+        await asyncio.gather(*(client() for _ in range(clients)))
+
+    asyncio.run(main())
+    return timings
+
+
+def measure(run, requests):
+    started = time.perf_counter()
+    timings = sorted(run(requests))
+    return {'rps': len(requests) / (time.perf_counter() - started),
+            'p95': percentile(timings, 95)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--groups', type=int, default=10)
+    parser.add_argument('--posts', type=int, default=5000)
+    parser.add_argument('--clients', type=int, default=16,
+                        help='Одновременных клиентов.')
+    parser.add_argument('--threads', type=int, default=None,
+                        help='Потоков ASGI-пула, по умолчанию ASGI_THREADS.')
+    parser.add_argument('--requests', type=int, default=400,
+                        help='Запросов к каждой странице.')
+    parser.add_argument('--endpoints', nargs='+', choices=ENDPOINTS,
+                        default=ENDPOINTS)
+    args = parser.parse_args()
+    setup()
+
+    from django.conf import settings
+    from django.core.cache import cache
+    from django.core.handlers.wsgi import WSGIHandler
+
+    from benchmarks.seed import seed
+    from posts.models import Post
+    from yatube.asgi import WsgiToAsgi
+
+    threads = args.threads or settings.ASGI_THREADS
+    rng = random.Random(0)
+    with test_database():
+        cache.clear()
+        authors, groups = seed(args.users, args.groups, args.posts, rng=rng)
+        user = authors[0]
+        posts = list(Post.objects.select_related('author')[:500])
+        makers = scenarios(user, authors, groups, posts, posts, rng)
+        driver = Driver(user)
+        app = WsgiToAsgi(WSGIHandler(), threads)
+        results = {}
+        for name in args.endpoints:
+            requests = [makers[name]() for _ in range(args.requests)]
+            # Прогрев: шаблоны, кэш фрагментов, соединения потоков.
+            run_wsgi(driver, requests[:args.clients], args.clients)
+            results[name] = (
+                measure(lambda batch: run_wsgi(driver, batch, args.clients),
+                        requests),
+                measure(lambda batch: run_asgi(app, driver.cookie, batch,
+                                               args.clients),
+                        requests),
+            )
+        app.close()
+
+    print(f'клиентов: {args.clients}, потоков ASGI: {threads}')
+    print(f"{'страница':<10}{'WSGI rps':>10}{'ASGI rps':>10}"
+          f"{'WSGI p95':>10}{'ASGI p95':>10}")
+    for name, (wsgi, asgi) in results.items():
+        print(f"{name:<10}{wsgi['rps']:>10.0f}{asgi['rps']:>10.0f}"
+              f"{wsgi['p95']:>10.2f}{asgi['p95']:>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
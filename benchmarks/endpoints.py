@@ -0,0 +1,216 @@
+"""
+Нагрузочный замер страниц yatube через WSGI-приложение в том же процессе.
+
+Печатает p50/p95/p99 задержки, число SQL-запросов на запрос и запросы
+в секунду для каждой страницы и сравнивает их с сохранённым базовым
+замером: при регрессии выходит с кодом 1.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from http.cookies import SimpleCookie
+
+from benchmarks import percentile, setup, test_database
+
+
+BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+ENDPOINTS = ('index', 'group', 'profile', 'post', 'new', 'edit')
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class Driver:
+    """Запросы к WSGIHandler от имени одного пользователя, без test.Client."""
+
+    def __init__(self, user, anonymous=False):
+        from django.core.handlers.wsgi import WSGIHandler
+        from django.middleware.csrf import _get_new_csrf_token
+        from django.test import Client, RequestFactory
+
+        self.handler = WSGIHandler()
+        self.csrf_token = _get_new_csrf_token()
+        cookies = SimpleCookie()
+        if not anonymous:
+            client = Client()
+            client.force_login(user)
+            cookies = client.cookies
+        cookies['csrftoken'] = self.csrf_token
+        self.cookie = '; '.join(f'{morsel.key}={morsel.value}'
+                                for morsel in cookies.values())
+        self.factory = RequestFactory(
+            HTTP_COOKIE=self.cookie,
+            HTTP_X_CSRFTOKEN=self.csrf_token,
+        )
+
+    def request(self, method, path, data=None):
+        environ = getattr(self.factory, method)(path, data or {}).environ
+        statuses = []
+        response = self.handler(
+            environ, lambda status, headers: statuses.append(status))
+        try:
+            for _ in response:
+                pass
+        finally:
+            response.close()
+        return int(statuses[0].split()[0])
+
+
+def scenarios(user, authors, groups, posts, own_posts, rng):
+    """Для каждой страницы - функция, выдающая (метод, путь, данные)."""
+    from django.urls import reverse
+
+    def post_url(post):
+        return reverse('post', args=(post.author.username, post.pk))
+
+    return {
+        'index': lambda: ('get', reverse('index'), None),
+        'group': lambda: (
+            'get', reverse('group', args=(rng.choice(groups).slug,)), None),
+        'profile': lambda: (
+            'get', reverse('profile', args=(rng.choice(authors).username,)),
+            None),
+        'post': lambda: ('get', post_url(rng.choice(posts)), None),
+        'new': lambda: ('post', reverse('new_post'), {
+            'text': 'Новая запись из замера', 'group': rng.choice(groups).pk}),
+        'edit': lambda: ('post', reverse('post_edit', args=(
+            user.username, rng.choice(own_posts).pk)), {
+            'text': 'Исправленная запись из замера'}),
+    }
+
+
+def measure(driver, make_request, repeat, warmup):
+    from django.db import connection
+
+    for _ in range(warmup):
+        driver.request(*make_request())
+    timings, queries = [], []
+    started = time.perf_counter()
+    for _ in range(repeat):
+        method, path, data = make_request()
+        counter = QueryCounter()
+        start = time.perf_counter()
+        with connection.execute_wrapper(counter):
+            status = driver.request(method, path, data)
+        timings.append((time.perf_counter() - start) * 1000)
+        queries.append(counter.count)
+        if status not in (200, 302):
+            raise SystemExit(f'{method.upper()} {path}: ответ {status}')
+    elapsed = time.perf_counter() - started
+    timings.sort()
+    result = {
+        'p50': percentile(timings, 50),
+        'p95': percentile(timings, 95),
+        'p99': percentile(timings, 99),
+        'queries': sum(queries) / len(queries),
+        'rps': repeat / elapsed,
+    }
+    return {metric: round(value, 3) for metric, value in result.items()}
+
+
+def compare(results, baseline, tolerance):
+    """Список регрессий относительно baseline."""
+    problems = []
+    for name, result in results.items():
+        base = baseline['endpoints'].get(name)
+        if base is None:
+            continue
+        if result['queries'] > base['queries']:
+            problems.append(f"{name}: запросов {result['queries']:.1f}, "
+                            f"было {base['queries']:.1f}")
+        for metric in ('p50', 'p95', 'p99'):
+            if result[metric] > base[metric] * (1 + tolerance):
+                problems.append(f'{name}: {metric} {result[metric]:.2f} мс, '
+                                f'было {base[metric]:.2f} мс')
+        if result['rps'] < base['rps'] * (1 - tolerance):
+            problems.append(f"{name}: {result['rps']:.0f} запросов/с, "
+                            f"было {base['rps']:.0f}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--groups', type=int, default=10)
+    parser.add_argument('--posts', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=200,
+                        help='Запросов к каждой странице.')
+    parser.add_argument('--warmup', type=int, default=20)
+    parser.add_argument('--endpoints', nargs='+', choices=ENDPOINTS,
+                        default=ENDPOINTS)
+    parser.add_argument('--anonymous', action='store_true',
+                        help='GET-страницы от анонима, через кэш лент.')
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=0.5,
+                        help='Допустимое замедление, доля от базового.')
+    args = parser.parse_args()
+    setup()
+
+    from django.core.cache import cache
+
+    from benchmarks.seed import seed
+    from posts.models import Post
+
+    rng = random.Random(0)
+    dataset = {'users': args.users, 'groups': args.groups,
+               'posts': args.posts}
+    with test_database():
+        cache.clear()
+        started = time.perf_counter()
+        authors, groups = seed(args.users, args.groups, args.posts, rng=rng)
+        print(f'наполнение: {time.perf_counter() - started:.1f} с')
+        user = authors[0]
+        posts = list(Post.objects.select_related('author')[:500])
+        own_posts = list(Post.objects.filter(author=user)[:50]) or [
+            Post.objects.create(text='Запись для правки', author=user)]
+        makers = scenarios(user, authors, groups, posts, own_posts, rng)
+        results = {}
+        for name in args.endpoints:
+            anonymous = args.anonymous and name not in ('new', 'edit')
+            driver = Driver(user, anonymous=anonymous)
+            results[name] = measure(driver, makers[name], args.repeat,
+                                    args.warmup)
+
+    print(f"{'страница':<10}{'p50':>9}{'p95':>9}{'p99':>9}"
+          f"{'запросов':>10}{'rps':>9}")
+    for name, result in results.items():
+        print(f"{name:<10}{result['p50']:>9.2f}{result['p95']:>9.2f}"
+              f"{result['p99']:>9.2f}{result['queries']:>10.1f}"
+              f"{result['rps']:>9.0f}")
+
+    report = {'dataset': dataset, 'endpoints': results}
+    if args.save_baseline:
+        with open(args.baseline, 'w') as file:
+            json.dump(report, file, indent=2, sort_keys=True)
+            file.write('\n')
+        print(f'базовый замер сохранён в {args.baseline}')
+        return
+    if not os.path.exists(args.baseline):
+        print('базового замера нет: запустите с --save-baseline')
+        return
+    with open(args.baseline) as file:
+        baseline = json.load(file)
+    if baseline['dataset'] != dataset:
+        sys.exit(f"базовый замер снят на другом наборе данных: "
+                 f"{baseline['dataset']}")
+    problems = compare(results, baseline, args.tolerance)
+    if problems:
+        print('РЕГРЕССИЯ относительно базового замера:', file=sys.stderr)
+        for problem in problems:
+            print(f'  {problem}', file=sys.stderr)
+        sys.exit(1)
+    print('регрессий нет')
+
+
+if __name__ == '__main__':
+    main()
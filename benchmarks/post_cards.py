@@ -0,0 +1,49 @@
+"""Время отрисовки страницы из 10 карточек без кэша фрагментов и с ним."""
+import argparse
+
+from benchmarks import median, setup, test_database, timed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+    setup()
+
+    from django.contrib.auth.models import AnonymousUser
+    from django.core.cache import cache
+    from django.core.paginator import Paginator
+    from django.template.loader import render_to_string
+    from django.test import RequestFactory
+
+    from posts.models import Post, User
+    from posts.views import PGR
+
+    with test_database():
+        author = User.objects.create_user(username='bench', first_name='Имя',
+                                          last_name='Фамилия')
+        text = '\n'.join(['Строка записи для замера отрисовки.'] * 40)
+        Post.objects.bulk_create(
+            Post(text=text, author=author) for _ in range(PGR))
+        paginator = Paginator(Post.objects.for_feed(), PGR)
+        page = paginator.get_page(1)
+        list(page)
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+        context = {'page': page, 'paginator': paginator}
+
+        def render():
+            render_to_string('index.html', context, request)
+
+        cold = timed(render, args.repeat, before=cache.clear)
+        render()
+        warm = timed(render, args.repeat)
+
+    saved = median(cold) - median(warm)
+    print(f'без кэша фрагментов: {median(cold):.3f} мс')
+    print(f'с кэшем фрагментов:  {median(warm):.3f} мс')
+    print(f'экономия: {saved:.3f} мс ({saved / median(cold):.0%})')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""Быстрое наполнение базы для замеров: bulk_create без сигналов."""
+import random
+from datetime import timedelta
+
+
+def seed(users, groups, posts, batch_size=1000, rng=None):
+    """
+    Создаёт users авторов, groups групп и posts записей.
+
+    Записи распределяются по авторам и группам случайно (rng),
+    у четверти записей группы нет. Счётчики пересчитываются в конце.
+    Возвращает (авторы, группы).
+    """
+    from django.contrib.auth.hashers import make_password
+    from django.utils import timezone
+
+    from posts.counters import recount_posts
+    from posts.models import Group, Post, User
+    from posts.transfer import bulk_create_dated
+
+    rng = rng or random.Random(0)
+    # Хэш пароля считается один раз: он самая медленная часть пользователя.
+    password = make_password('bench-password')
+    User.objects.bulk_create(
+        User(username=f'user{number}', password=password,
+             first_name='Имя', last_name=f'Фамилия{number}')
+        for number in range(users))
+    Group.objects.bulk_create(
+        Group(title=f'Группа {number}', slug=f'group-{number}',
+              description='Группа для замеров')
+        for number in range(groups))
+    author_ids = list(User.objects.filter(
+        username__startswith='user').values_list('pk', flat=True))
+    group_ids = list(Group.objects.values_list('pk', flat=True))
+
+    start = timezone.now() - timedelta(minutes=posts)
+    batch = []
+    for number in range(posts):
+        batch.append(Post(
+            text=f'Запись {number} для замеров. ' * 5,
+            pub_date=start + timedelta(minutes=number),
+            author_id=rng.choice(author_ids),
+            group_id=(rng.choice(group_ids)
+                      if group_ids and rng.random() < 0.75 else None),
+        ))
+        if len(batch) == batch_size:
+            bulk_create_dated(batch)
+            batch = []
+    bulk_create_dated(batch)
+    recount_posts()
+    return (list(User.objects.filter(pk__in=author_ids)),
+            list(Group.objects.filter(pk__in=group_ids)))
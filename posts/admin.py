@@ -1,13 +1,25 @@
 from django.contrib import admin
 
-from .models import Post, Group
+from .models import Comment, Follow, Post, Group
+from .search import get_backend
 
 
 class PostAdmin(admin.ModelAdmin):
-    list_display = ("pk", "text", "pub_date", "author", "group")
+    list_display = ("pk", "short_text", "pub_date", "author", "group")
+    list_select_related = ("author", "group")
     search_fields = ("text",)
     list_filter = ("pub_date",)
     empty_value_display = "-пусто-"
+    show_full_result_count = False
+
+    def short_text(self, obj):
+        return str(obj)
+    short_text.short_description = "Текст"
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        return get_backend().filter(queryset, search_term), False
 
 
 admin.site.register(Post, PostAdmin)
@@ -21,3 +33,28 @@ class GroupAdmin(admin.ModelAdmin):
 
 
 admin.site.register(Group, GroupAdmin)
+
+
+class FollowAdmin(admin.ModelAdmin):
+    list_display = ("pk", "user", "author", "created")
+    list_select_related = ("user", "author")
+    raw_id_fields = ("user", "author")
+    empty_value_display = "-пусто-"
+
+
+admin.site.register(Follow, FollowAdmin)
+
+
+class CommentAdmin(admin.ModelAdmin):
+    list_display = ("pk", "short_text", "created", "author", "post")
+    list_select_related = ("author", "post")
+    raw_id_fields = ("author", "post")
+    empty_value_display = "-пусто-"
+    show_full_result_count = False
+
+    def short_text(self, obj):
+        return str(obj)
+    short_text.short_description = "Текст"
+
+
+admin.site.register(Comment, CommentAdmin)
@@ -0,0 +1,221 @@
+"""
+Версии лент - метки кэша, от которых зависят страницы.
+
+Метка - имя ленты: index (все записи), group:<id>, author:<id>,
+post:<id>. Ключи закэшированных страниц содержат текущую версию метки,
+поэтому сброс - это смена одного числа, без перебора ключей: старые
+страницы просто перестают находиться и вытесняются по таймауту.
+"""
+import hashlib
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.views.decorators.http import condition
+
+from yatube.routers import reading_replicas, replicas, use_primary
+
+
+PAGE_PARAMS = ('page', 'after', 'before')
+EVENTS = ('hits', 'misses', 'invalidations')
+
+
+class CacheStats:
+    """
+    Попадания, промахи и сбросы кэша по видам меток.
+
+    Как и статистика профилирования, хранится в памяти процесса.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = defaultdict(Counter)
+
+    def add(self, name, event):
+        with self.lock:
+            self.counts[name][event] += 1
+
+    def clear(self):
+        with self.lock:
+            self.counts.clear()
+
+    def summary(self):
+        """Счётчики и доля попаданий по каждому виду."""
+        with self.lock:
+            counts = {name: dict(events)
+                      for name, events in self.counts.items()}
+        result = []
+        for name, events in sorted(counts.items()):
+            row = {'name': name,
+                   **{event: events.get(event, 0) for event in EVENTS}}
+            lookups = row['hits'] + row['misses']
+            row['hit_rate'] = row['hits'] / lookups if lookups else None
+            result.append(row)
+        return result
+
+
+stats = CacheStats()
+
+
+def feed_kind(feed):
+    """Вид метки: group:5 -> group."""
+    return feed.split(':', 1)[0]
+
+
+def _version_key(feed):
+    return f'feed:{feed}:version'
+
+
+def _new_version():
+    # Версия уникальна во времени: если ключ версии вытеснен из кэша,
+    # страницы прежних версий не оживут.
+    return time.time_ns()
+
+
+def _modified_key(feed):
+    return f'feed:{feed}:modified'
+
+
+def feed_version(feed):
+    key = _version_key(feed)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _new_version(), settings.FEED_VERSION_TIMEOUT)
+        cache.add(_modified_key(feed), time.time(),
+                  settings.FEED_VERSION_TIMEOUT)
+        version = cache.get(key)
+    return version
+
+
+def _bump(feeds):
+    # Новая уникальная версия, а не incr: в файловом кэше incr - это чтение
+    # и запись, и опоздавшая запись вернула бы старую версию вместе
+    # со страницами, закэшированными под ней.
+    now = time.time()
+    versions = {_version_key(feed): _new_version() for feed in feeds}
+    cache.set_many({**versions,
+                    **{_modified_key(feed): now for feed in feeds}},
+                   settings.FEED_VERSION_TIMEOUT)
+
+
+def invalidate_feeds(*feeds):
+    """
+    Сбрасывает закэшированные страницы лент.
+
+    Версии меняются сразу и ещё раз после фиксации транзакции: иначе
+    чтение между ними успело бы положить в кэш старую страницу.
+    """
+    for feed in feeds:
+        stats.add(feed_kind(feed), 'invalidations')
+    _bump(feeds)
+    transaction.on_commit(lambda: _bump(feeds))
+
+
+def post_feeds(post, *group_ids):
+    """Ленты, в которых показывается запись, и её собственная страница."""
+    feeds = ['index', f'author:{post.author_id}', f'post:{post.pk}']
+    for group_id in {post.group_id, *group_ids}:
+        if group_id is not None:
+            feeds.append(f'group:{group_id}')
+    return feeds
+
+
+def page_key(feed, request):
+    page = '|'.join(request.GET.get(name, '') for name in PAGE_PARAMS)
+    digest = hashlib.md5(page.encode()).hexdigest()
+    return f'feed:{feed}:{feed_version(feed)}:{digest}'
+
+
+def cached_feed(request, feed, render):
+    """Страница ленты для анонимов из кэша; render() строит её заново."""
+    if request.user.is_authenticated or request.method != 'GET':
+        return render()
+    key = page_key(feed, request)
+    response = cache.get(key)
+    stats.add(feed_kind(feed), 'misses' if response is None else 'hits')
+    if response is None:
+        # Отставшая реплика положила бы в кэш новой версии старую страницу.
+        with use_primary():
+            response = render()
+        if response.status_code == 200:
+            cache.set(key, response, settings.FEED_CACHE_TIMEOUT)
+    return response
+
+
+def post_author_id(post_id, load):
+    """
+    Автор записи из кэша: у записи он не меняется.
+
+    При промахе запись берёт load() - тот же объект потом получит
+    представление, и лишнего запроса нет.
+    """
+    key = f'post:{post_id}:author'
+    author_id = cache.get(key)
+    stats.add('post_author', 'misses' if author_id is None else 'hits')
+    if author_id is None:
+        post = load()
+        if post is None:
+            return None
+        author_id = post.author_id
+        cache.set(key, author_id, settings.FEED_VERSION_TIMEOUT)
+    return author_id
+
+
+def feeds_etag(request, feeds):
+    """ETag страницы: версии её лент и пользователь, для которого она."""
+    versions = ':'.join(str(feed_version(feed)) for feed in feeds)
+    digest = hashlib.md5(
+        f'{request.user.pk or 0}:{versions}'.encode()).hexdigest()
+    return f'"{digest}"'
+
+
+def feeds_modified(feeds):
+    """Время последнего изменения лент; None, если оно вытеснено из кэша."""
+    stamps = cache.get_many([_modified_key(feed) for feed in feeds])
+    if len(stamps) < len(feeds):
+        return None
+    return datetime.fromtimestamp(max(stamps.values()), timezone.utc)
+
+
+def conditional_feed(get_feeds):
+    """
+    Условный GET по версиям лент, которые возвращает get_feeds.
+
+    Совпали ETag или Last-Modified - ответ 304 без представления.
+    """
+    def feeds(request, *args, **kwargs):
+        # ETag и Last-Modified считаются по одним и тем же лентам.
+        if not hasattr(request, '_conditional_feeds'):
+            request._conditional_feeds = get_feeds(request, *args, **kwargs)
+        return request._conditional_feeds
+
+    def etag(request, *args, **kwargs):
+        names = feeds(request, *args, **kwargs)
+        return names and feeds_etag(request, names)
+
+    def last_modified(request, *args, **kwargs):
+        names = feeds(request, *args, **kwargs)
+        return names and feeds_modified(names)
+
+    def decorator(view):
+        conditional = condition(etag_func=etag,
+                                last_modified_func=last_modified)(view)
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            # Версии меняет основная база: страница отставшей реплики
+            # ушла бы под новым ETag.
+            if (reading_replicas() and replicas()
+                    and request.user.is_authenticated):
+                return view(request, *args, **kwargs)
+            with use_primary():
+                return conditional(request, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,122 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import AuthorStats, Comment, Follow, Group, Post, User
+
+
+TOTAL_POSTS_KEY = 'posts:total'
+
+
+def change_author_stats(author_id, field, delta):
+    stats = AuthorStats.objects.filter(author_id=author_id)
+    if delta < 0:
+        stats = stats.filter(**{f'{field}__gte': -delta})
+    if not stats.update(**{field: F(field) + delta}) and delta > 0:
+        stats, created = AuthorStats.objects.get_or_create(
+            author_id=author_id, defaults={field: delta})
+        if not created:
+            change_author_stats(author_id, field, delta)
+
+
+def change_author_posts(author_id, delta):
+    change_author_stats(author_id, 'posts_count', delta)
+
+
+def change_group_posts(group_id, delta):
+    if group_id is None:
+        return
+    groups = Group.objects.filter(pk=group_id)
+    if delta < 0:
+        groups = groups.filter(posts_count__gte=-delta)
+    groups.update(posts_count=F('posts_count') + delta)
+
+
+def change_post_comments(post_id, delta):
+    posts = Post.objects.filter(pk=post_id)
+    if delta < 0:
+        posts = posts.filter(comments_count__gte=-delta)
+    # update() не трогает Post.updated: кэш карточки зависит от самого
+    # счётчика, а не от даты изменения записи.
+    posts.update(comments_count=F('comments_count') + delta)
+
+
+def _incr_total_posts(delta):
+    try:
+        cache.incr(TOTAL_POSTS_KEY, delta)
+    except ValueError:
+        pass
+
+
+def change_total_posts(delta):
+    # Кэш не откатывается вместе с транзакцией: откаченная запись
+    # оставила бы в счётчике лишнюю страницу.
+    transaction.on_commit(lambda: _incr_total_posts(delta))
+
+
+def total_posts_count():
+    """
+    Число всех записей для главной страницы.
+
+    Хранится в кэше, меняется при записи и пересчитывается раз
+    в POSTS_COUNT_TIMEOUT секунд, так что итог может слегка отставать.
+    """
+    total = cache.get(TOTAL_POSTS_KEY)
+    if total is None:
+        total = Post.objects.count()
+        cache.add(TOTAL_POSTS_KEY, total, settings.POSTS_COUNT_TIMEOUT)
+    return max(total, 0)
+
+
+def posts_count(author):
+    """Число записей автора из счётчика; None, если счётчика ещё нет."""
+    stats = getattr(author, 'stats', None)
+    return stats.posts_count if stats is not None else None
+
+
+def _count(model, field):
+    rows = model.objects.filter(**{field: OuterRef('pk')}).order_by()
+    rows = rows.values(field).annotate(n=Count('pk')).values('n')
+    return Coalesce(Subquery(rows), 0)
+
+
+def recount_posts():
+    """
+    Пересчитывает счётчики записей, комментариев и подписок.
+
+    Возвращает число исправлений.
+    """
+    fixed = 0
+    fields = ('posts_count', 'followers_count', 'following_count')
+    # Отдельные подзапросы вместо трёх JOIN: иначе COUNT перемножаются.
+    authors = User.objects.annotate(
+        posts_count=_count(Post, 'author'),
+        followers_count=_count(Follow, 'author'),
+        following_count=_count(Follow, 'user'),
+    ).values_list('pk', *fields)
+    for author_id, *counts in authors.iterator():
+        counts = dict(zip(fields, counts))
+        stats, created = AuthorStats.objects.get_or_create(
+            author_id=author_id, defaults=counts)
+        changed = [field for field, count in counts.items()
+                   if getattr(stats, field) != count]
+        if not created and changed:
+            for field in changed:
+                setattr(stats, field, counts[field])
+            stats.save(update_fields=changed)
+            fixed += len(changed)
+    groups = Group.objects.annotate(n=Count('group')).values_list(
+        'pk', 'n', 'posts_count')
+    for group_id, count, stored in groups.iterator():
+        if count != stored:
+            Group.objects.filter(pk=group_id).update(posts_count=count)
+            fixed += 1
+    posts = Post.objects.annotate(n=_count(Comment, 'post')).exclude(
+        comments_count=F('n')).values_list('pk', 'n')
+    for post_id, count in posts.iterator():
+        Post.objects.filter(pk=post_id).update(comments_count=count)
+        fixed += 1
+    cache.delete(TOTAL_POSTS_KEY)
+    return fixed
@@ -0,0 +1,55 @@
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from posts.models import Post, User
+from posts.pagination import KeysetPaginator, encode_cursor
+from posts.timeline import follow_paginator
+from posts.views import PGR
+
+
+FULL_SCAN = re.compile(r'\bSCAN (TABLE )?posts_post\b(?! USING)')
+TEMP_SORT = re.compile(r'USE TEMP B-TREE')
+
+
+def feed_querysets():
+    """Запросы лент в том виде, в каком их строят представления."""
+    cursor = encode_cursor(timezone.now(), 1)
+    feeds = {
+        'index': Post.objects.for_feed(),
+        'group': Post.objects.for_feed().filter(group_id=1),
+        'profile': Post.objects.for_feed().filter(author_id=1),
+    }
+    for name, queryset in feeds.items():
+        keyset = KeysetPaginator(queryset, PGR)
+        yield name, keyset.queryset()
+        yield f'{name} ?page=', queryset[PGR * 5:PGR * 6]
+        yield f'{name} ?after=', keyset.queryset(after=cursor)
+        yield f'{name} ?before=', keyset.queryset(before=cursor)
+    follow = follow_paginator(User(pk=1), PGR).sources[0]
+    yield 'follow', follow.queryset()
+    yield 'follow ?after=', follow.queryset(after=cursor)
+    yield 'follow ?before=', follow.queryset(before=cursor)
+
+
+class Command(BaseCommand):
+    help = ('Проверяет EXPLAIN QUERY PLAN запросов лент: ни один не должен '
+            'читать posts_post целиком или сортировать во временном B-дереве.')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('EXPLAIN QUERY PLAN поддерживается только '
+                               'для SQLite.')
+        failed = []
+        for name, queryset in feed_querysets():
+            plan = queryset.explain()
+            if FULL_SCAN.search(plan) or TEMP_SORT.search(plan):
+                failed.append(name)
+                self.stderr.write(f'{name}:\n{plan}')
+            elif options['verbosity'] > 1:
+                self.stdout.write(f'{name}:\n{plan}')
+        if failed:
+            raise CommandError('Запросы без индекса: ' + ', '.join(failed))
+        self.stdout.write(self.style.SUCCESS('Все ленты используют индексы.'))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from yatube.template_warmup import warm_templates
+
+
+class Command(BaseCommand):
+    help = ('Компилирует все шаблоны проекта и сообщает '
+            'о синтаксических ошибках.')
+
+    def handle(self, *args, **options):
+        errors = warm_templates()
+        for name, error in errors.items():
+            self.stderr.write(f'{name}: {error}')
+        if errors:
+            raise CommandError(f'Шаблонов с ошибками: {len(errors)}')
+        self.stdout.write(self.style.SUCCESS('Все шаблоны скомпилированы.'))
@@ -0,0 +1,33 @@
+import os
+import sys
+
+from django.core.management.base import BaseCommand
+
+from posts.models import Post
+from posts.transfer import FORMATS, iter_records, write_records
+
+
+class Command(BaseCommand):
+    help = 'Выгружает записи в JSON Lines или CSV потоком, пачками по id.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', nargs='?',
+                            help='Файл; по умолчанию - stdout.')
+        parser.add_argument('--format', choices=FORMATS)
+        parser.add_argument('--author', help='Только записи автора.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        output = options['output']
+        fmt = options['format'] or (
+            'csv' if output and output.endswith('.csv') else 'jsonl')
+        posts = Post.objects.all()
+        if options['author']:
+            posts = posts.filter(author__username=options['author'])
+        records = iter_records(posts, options['batch_size'])
+        if output is None:
+            write_records(records, sys.stdout, fmt)
+            return
+        with open(output, 'w', newline='', encoding='utf-8') as file:
+            write_records(records, file, fmt)
+        self.stderr.write(f'Записи выгружены в {os.path.abspath(output)}')
@@ -0,0 +1,91 @@
+import json
+import os
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from posts.cache import invalidate_feeds
+from posts.models import Post
+from posts.search import index_posts
+from posts.timeline import fan_out_imported
+from posts.transfer import FORMATS, Importer, read_records
+
+
+def batches(records, size):
+    while True:
+        batch = list(islice(records, size))
+        if not batch:
+            return
+        yield batch
+
+
+class Command(BaseCommand):
+    help = ('Загружает записи из JSON Lines или CSV пачками через '
+            'bulk_create; автор - username, группа - slug.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=FORMATS)
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--cache-size', type=int, default=10000,
+                            help='Размер кэша авторов и групп.')
+        parser.add_argument('--checkpoint',
+                            help='Файл с позицией последней сохранённой '
+                                 'пачки.')
+        parser.add_argument('--resume', action='store_true',
+                            help='Продолжить с позиции из --checkpoint.')
+
+    def read_checkpoint(self, options):
+        path = options['checkpoint']
+        if not options['resume']:
+            return None
+        if not path or not os.path.exists(path):
+            raise CommandError('Для --resume нужен существующий '
+                               '--checkpoint.')
+        with open(path) as file:
+            return json.load(file)
+
+    def write_checkpoint(self, path, state):
+        if path:
+            with open(path + '.tmp', 'w') as file:
+                json.dump(state, file)
+            os.replace(path + '.tmp', path)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or (
+            'csv' if path.endswith('.csv') else 'jsonl')
+        state = self.read_checkpoint(options) or {
+            'processed': 0,
+            'last_pk': Post.objects.order_by('-pk').values_list(
+                'pk', flat=True).first() or 0,
+        }
+        importer = Importer(options['batch_size'], options['cache_size'])
+        with open(path, newline='', encoding='utf-8') as file:
+            records = islice(read_records(file, fmt), state['processed'],
+                             None)
+            for batch in batches(records, options['batch_size']):
+                with transaction.atomic():
+                    importer.save(batch)
+                state['processed'] += len(batch)
+                self.write_checkpoint(options['checkpoint'], state)
+                if options['verbosity'] > 1:
+                    self.stdout.write(f'Обработано: {state["processed"]}')
+
+        # bulk_create не вызывает сигналы: индекс, ленты подписок и кэш
+        # лент обновляем одним проходом после загрузки, счётчики
+        # Importer меняет с каждой пачкой.
+        index_posts(Post.objects.filter(pk__gt=state['last_pk']),
+                    options['batch_size'])
+        for author_id in importer.author_ids:
+            fan_out_imported.delay(author_id, state['last_pk'])
+        invalidate_feeds(
+            'index',
+            *(f'author:{pk}' for pk in importer.author_ids),
+            *(f'group:{pk}' for pk in importer.group_ids),
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено: {importer.created}, '
+            f'пропущено без автора: {importer.skipped}, '
+            f'с ошибками: {importer.invalid}'))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from posts.models import Post
+from posts.search import get_backend, index_posts
+
+
+class Command(BaseCommand):
+    help = 'Заново строит поисковый индекс записей пачками.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        get_backend().clear()
+        total = index_posts(Post.objects.all(), options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Записей в индексе: {total}'))
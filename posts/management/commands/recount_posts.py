@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from posts.counters import recount_posts
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счётчики записей, комментариев и подписок.'
+
+    def handle(self, *args, **options):
+        fixed = recount_posts()
+        self.stdout.write(self.style.SUCCESS(f'Исправлено счётчиков: {fixed}'))
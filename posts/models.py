@@ -2,6 +2,8 @@ from django.utils.text import Truncator
 from django.db import models
 from django.contrib.auth import get_user_model
 
+from .storage import ContentAddressedStorage
+
 
 User = get_user_model()
 
@@ -21,11 +23,27 @@ class Group(models.Model):
         verbose_name='Описание',
         help_text='Описание группы'
     )
+    posts_count = models.PositiveIntegerField(
+        verbose_name='Записей',
+        default=0,
+        editable=False,
+    )
 
     def __str__(self):
         return self.title
 
 
+class PostQuerySet(models.QuerySet):
+    def for_feed(self):
+        """Записи ленты с автором и группой за один запрос."""
+        return self.select_related('author', 'group').only(
+            'text', 'pub_date', 'updated', 'comments_count',
+            'thumbnail', 'thumbnail_width', 'thumbnail_height',
+            'author__username', 'author__first_name', 'author__last_name',
+            'group__title', 'group__slug',
+        )
+
+
 class Post(models.Model):
     text = models.TextField(
         verbose_name='Текст',
@@ -36,6 +54,11 @@ class Post(models.Model):
         auto_now_add=True,
         help_text='Дата'
     )
+    updated = models.DateTimeField(
+        verbose_name='Дата изменения',
+        auto_now=True,
+        help_text='Дата последнего изменения'
+    )
     author = models.ForeignKey(
         User,
         verbose_name='Автор',
@@ -52,11 +75,185 @@ class Post(models.Model):
         related_name="group",
         help_text='Название группы'
     )
-    objects = models.Manager()
+    comments_count = models.PositiveIntegerField(
+        verbose_name='Комментариев',
+        default=0,
+        editable=False,
+    )
+    image = models.ImageField(
+        verbose_name='Картинка',
+        upload_to='posts/',
+        storage=ContentAddressedStorage(),
+        blank=True,
+        help_text='Загрузите картинку'
+    )
+    # Миниатюру готовит posts.thumbnails вне запроса; её размеры
+    # хранятся в записи, чтобы шаблоны не открывали файл.
+    thumbnail = models.ImageField(
+        verbose_name='Миниатюра',
+        upload_to='posts/thumbnails/',
+        storage=ContentAddressedStorage(),
+        blank=True,
+        editable=False,
+        width_field='thumbnail_width',
+        height_field='thumbnail_height',
+    )
+    thumbnail_width = models.PositiveIntegerField(
+        verbose_name='Ширина миниатюры',
+        null=True,
+        editable=False,
+    )
+    thumbnail_height = models.PositiveIntegerField(
+        verbose_name='Высота миниатюры',
+        null=True,
+        editable=False,
+    )
+    objects = PostQuerySet.as_manager()
+
+    class Meta:
+        ordering = ('-pub_date', '-id')
+        indexes = (
+            models.Index(fields=('-pub_date', '-id'),
+                         name='post_feed_idx'),
+            models.Index(fields=('author', '-pub_date', '-id'),
+                         name='post_author_feed_idx'),
+            models.Index(fields=('group', '-pub_date', '-id'),
+                         name='post_group_feed_idx'),
+        )
+
+    def __str__(self):
+        # Запоминаем сокращение вместе с исходным текстом: пересчёт
+        # нужен, только если текст изменился.
+        source, short = self.__dict__.get('_short_text', (None, None))
+        if source != self.text:
+            short = Truncator(self.text).words(10)
+            self._short_text = (self.text, short)
+        return short
+
+
+class Comment(models.Model):
+    post = models.ForeignKey(
+        Post,
+        verbose_name='Запись',
+        on_delete=models.CASCADE,
+        related_name='comments',
+    )
+    author = models.ForeignKey(
+        User,
+        verbose_name='Автор',
+        on_delete=models.CASCADE,
+        related_name='comments',
+    )
+    text = models.TextField(
+        verbose_name='Текст',
+        help_text='Напишите комментарий'
+    )
+    created = models.DateTimeField(
+        verbose_name='Дата комментария',
+        auto_now_add=True,
+    )
+
+    class Meta:
+        ordering = ('created', 'id')
+        indexes = (
+            models.Index(fields=('post', 'created', 'id'),
+                         name='comment_post_idx'),
+        )
+
+    def __str__(self):
+        return Truncator(self.text).words(10)
+
+
+class AuthorStats(models.Model):
+    """Счётчики автора, которые поддерживают сигналы posts.signals."""
+    author = models.OneToOneField(
+        User,
+        verbose_name='Автор',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+    )
+    posts_count = models.PositiveIntegerField(
+        verbose_name='Записей',
+        default=0,
+    )
+    followers_count = models.PositiveIntegerField(
+        verbose_name='Подписчиков',
+        default=0,
+    )
+    following_count = models.PositiveIntegerField(
+        verbose_name='Подписок',
+        default=0,
+    )
+
+    def __str__(self):
+        return str(self.author_id)
+
+
+class Follow(models.Model):
+    user = models.ForeignKey(
+        User,
+        verbose_name='Подписчик',
+        on_delete=models.CASCADE,
+        related_name='follower',
+    )
+    author = models.ForeignKey(
+        User,
+        verbose_name='Автор',
+        on_delete=models.CASCADE,
+        related_name='following',
+    )
+    created = models.DateTimeField(
+        verbose_name='Дата подписки',
+        auto_now_add=True,
+    )
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(fields=('user', 'author'),
+                                    name='unique_follow'),
+            models.CheckConstraint(check=~models.Q(user=models.F('author')),
+                                   name='no_self_follow'),
+        )
+        indexes = (
+            models.Index(fields=('author', 'user'),
+                         name='follow_author_idx'),
+        )
+
+    def __str__(self):
+        return f'{self.user_id} -> {self.author_id}'
+
+
+class FeedEntry(models.Model):
+    """
+    Запись в ленте подписок пользователя, разложенная при публикации.
+
+    pub_date повторяет дату записи, чтобы лента читалась одним проходом
+    по индексу (user, -pub_date, -post).
+    """
+    user = models.ForeignKey(
+        User,
+        verbose_name='Читатель',
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+    )
+    post = models.ForeignKey(
+        Post,
+        verbose_name='Запись',
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+    )
+    pub_date = models.DateTimeField(verbose_name='Дата публикации')
 
     class Meta:
-        ordering = ('-pub_date',)
+        constraints = (
+            models.UniqueConstraint(fields=('user', 'post'),
+                                    name='unique_feed_entry'),
+        )
+        indexes = (
+            models.Index(fields=('user', '-pub_date', '-post'),
+                         name='feed_entry_user_idx'),
+        )
 
     def __str__(self):
-        self.text = Truncator(self.text).words(10)
-        return self.text
+        return f'{self.user_id}: {self.post_id}'
@@ -0,0 +1,196 @@
+import base64
+import binascii
+import heapq
+from collections.abc import Sequence
+
+from django.core.paginator import InvalidPage, Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+
+def encode_cursor(value, pk):
+    """Непрозрачный токен позиции в ленте: значение ключа и id записи."""
+    raw = f'{value.isoformat()}|{pk}'.encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    padded = token + '=' * (-len(token) % 4)
+    try:
+        value, pk = base64.urlsafe_b64decode(padded).decode().split('|')
+        value, pk = parse_datetime(value), int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise InvalidPage('Неверный курсор')
+    if value is None:
+        raise InvalidPage('Неверный курсор')
+    return value, pk
+
+
+class KeysetPage(Sequence):
+    is_keyset = True
+    number = None
+
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return '<Keyset page of %s>' % len(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    @property
+    def next_cursor(self):
+        if self.has_next():
+            return self.paginator.cursor_for(self.object_list[-1])
+
+    @property
+    def previous_cursor(self):
+        if self.has_previous():
+            return self.paginator.cursor_for(self.object_list[0])
+
+
+class KeysetPaginator:
+    """
+    Постраничная навигация по ключу (field, key), по умолчанию (field, id).
+
+    Каждая страница - один диапазонный запрос по индексу без COUNT(*)
+    и OFFSET, поэтому глубина страницы не влияет на её стоимость.
+    """
+
+    def __init__(self, object_list, per_page, field='pub_date',
+                 descending=True, key='pk'):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        self.field = field
+        self.descending = descending
+        self.key = key
+
+    def sort_key(self, obj):
+        return getattr(obj, self.field), getattr(obj, self.key)
+
+    def cursor_for(self, obj):
+        return encode_cursor(*self.sort_key(obj))
+
+    def _ordering(self, descending):
+        prefix = '-' if descending else ''
+        return f'{prefix}{self.field}', f'{prefix}{self.key}'
+
+    def _seek(self, cursor, descending):
+        """Записи строго за курсором в направлении обхода."""
+        value, pk = decode_cursor(cursor)
+        op = 'lt' if descending else 'gt'
+        return self.object_list.filter(
+            Q(**{f'{self.field}__{op}e': value}),
+            Q(**{f'{self.field}__{op}': value})
+            | Q(**{f'{self.key}__{op}': pk}),
+        )
+
+    def queryset(self, after=None, before=None):
+        """Запрос одной страницы с лишней записью для признака продолжения."""
+        if before:
+            queryset = self._seek(before, not self.descending)
+            ordering = self._ordering(not self.descending)
+        elif after:
+            queryset = self._seek(after, self.descending)
+            ordering = self._ordering(self.descending)
+        else:
+            queryset = self.object_list
+            ordering = self._ordering(self.descending)
+        return queryset.order_by(*ordering)[:self.per_page + 1]
+
+    def rows(self, after=None, before=None):
+        """Записи страницы в порядке обхода, не больше per_page + 1."""
+        return list(self.queryset(after=after, before=before))
+
+    def page(self, after=None, before=None):
+        rows = self.rows(after=after, before=before)
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if before:
+            rows.reverse()
+            return KeysetPage(rows, self, True, has_more)
+        return KeysetPage(rows, self, has_more, bool(after))
+
+    def get_page(self, after=None, before=None):
+        try:
+            return self.page(after=after, before=before)
+        except InvalidPage:
+            return self.page()
+
+
+class MergedKeysetPaginator(KeysetPaginator):
+    """
+    Курсорная навигация по нескольким запросам с общим ключом (field, key).
+
+    Страница собирается слиянием страниц всех запросов; запись, которую
+    вернули несколько запросов, показывается один раз.
+    """
+
+    def __init__(self, sources, per_page, field='pub_date',
+                 descending=True, key='pk'):
+        super().__init__(None, per_page, field, descending, key)
+        self.sources = [
+            KeysetPaginator(source, per_page, field, descending, key)
+            for source in sources
+        ]
+
+    def rows(self, after=None, before=None):
+        merged = heapq.merge(
+            *(source.rows(after=after, before=before)
+              for source in self.sources),
+            key=self.sort_key,
+            reverse=self.descending != bool(before),
+        )
+        rows, seen = [], set()
+        for obj in merged:
+            if self.sort_key(obj) in seen:
+                continue
+            seen.add(self.sort_key(obj))
+            rows.append(obj)
+            if len(rows) > self.per_page:
+                break
+        return rows
+
+
+def paginate(request, queryset, per_page, count=None):
+    """
+    Курсорная навигация при ?after= / ?before=, иначе - по номеру ?page=.
+
+    Ссылки «Предыдущая» / «Следующая» и на обычных страницах ведут
+    на курсоры, так что номер страницы нужен только для прямых переходов.
+    Известное заранее число записей (count) избавляет от COUNT(*).
+    """
+    after = request.GET.get('after')
+    before = request.GET.get('before')
+    if after or before:
+        paginator = KeysetPaginator(queryset, per_page)
+        return paginator, paginator.get_page(after=after, before=before)
+    paginator = Paginator(queryset, per_page)
+    if count is not None:
+        paginator.count = count
+    page = paginator.get_page(request.GET.get('page'))
+    keyset = KeysetPaginator(queryset, per_page)
+    # Счётчик может отставать, и последняя страница окажется пустой:
+    # тогда курсоров нет, остаются ссылки на номера страниц.
+    empty = not len(page)
+    page.next_cursor = (page.has_next() and not empty
+                        and keyset.cursor_for(page[-1]))
+    page.previous_cursor = (page.has_previous() and not empty
+                            and keyset.cursor_for(page[0]))
+    return paginator, page
@@ -0,0 +1,221 @@
+import base64
+import binascii
+import re
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.paginator import InvalidPage
+from django.db import connection, transaction
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+from tasks import task
+
+from .pagination import KeysetPage
+
+
+WORDS = re.compile(r'\w+')
+
+
+def encode_search_cursor(rank, pk):
+    raw = f'{rank!r}|{pk}'.encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_search_cursor(token):
+    padded = token + '=' * (-len(token) % 4)
+    try:
+        rank, pk = base64.urlsafe_b64decode(padded).decode().split('|')
+        return float(rank), int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise InvalidPage('Неверный курсор')
+
+
+class SearchBackend:
+    """
+    Поисковый индекс записей.
+
+    Результаты упорядочены по (rank, id): чем меньше rank, тем выше запись,
+    курсоры after/before - пары (rank, id) из decode_search_cursor.
+    """
+
+    def index(self, rows):
+        """Добавляет или обновляет записи; rows - пары (id, text)."""
+        raise NotImplementedError
+
+    def remove(self, pks):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def search(self, query, limit, after=None, before=None):
+        """Список пар (id, rank) не длиннее limit."""
+        raise NotImplementedError
+
+    def filter(self, queryset, query):
+        """Queryset, сужённый до записей, подходящих под запрос."""
+        raise NotImplementedError
+
+
+class SQLiteFTSBackend(SearchBackend):
+    """Индекс в виртуальной таблице FTS5, ранжирование по bm25."""
+    table = 'posts_post_fts'
+
+    @staticmethod
+    def match(query):
+        # Каждое слово - отдельная фраза в кавычках: пользовательский ввод
+        # не должен попадать в синтаксис запросов FTS5.
+        return ' '.join(f'"{word}"' for word in WORDS.findall(query))
+
+    def index(self, rows):
+        rows = list(rows)
+        with connection.cursor() as cursor:
+            cursor.executemany(f'DELETE FROM {self.table} WHERE rowid = %s',
+                               [(pk,) for pk, _ in rows])
+            cursor.executemany(
+                f'INSERT INTO {self.table} (rowid, text) VALUES (%s, %s)',
+                rows)
+
+    def remove(self, pks):
+        with connection.cursor() as cursor:
+            cursor.executemany(f'DELETE FROM {self.table} WHERE rowid = %s',
+                               [(pk,) for pk in pks])
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table}')
+
+    def search(self, query, limit, after=None, before=None):
+        match = self.match(query)
+        if not match:
+            return []
+        sql = (f'SELECT rowid, rank FROM {self.table} '
+               f'WHERE {self.table} MATCH %s')
+        params = [match]
+        order = 'rank, rowid'
+        if after or before:
+            rank, pk = after or before
+            op = '>' if after else '<'
+            sql += f' AND (rank {op} %s OR (rank = %s AND rowid {op} %s))'
+            params += [rank, rank, pk]
+        if before:
+            order = 'rank DESC, rowid DESC'
+        with connection.cursor() as cursor:
+            cursor.execute(f'{sql} ORDER BY {order} LIMIT %s',
+                           params + [limit])
+            rows = cursor.fetchall()
+        if before:
+            rows.reverse()
+        return rows
+
+    def filter(self, queryset, query):
+        match = self.match(query)
+        if not match:
+            return queryset.none()
+        return queryset.filter(pk__in=RawSQL(
+            f'SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s',
+            (match,)))
+
+
+class SimpleBackend(SearchBackend):
+    """Без индекса: LIKE по тексту, для баз без FTS5. Все ранги равны."""
+
+    def index(self, rows):
+        pass
+
+    def remove(self, pks):
+        pass
+
+    def clear(self):
+        pass
+
+    def search(self, query, limit, after=None, before=None):
+        from .models import Post
+        posts = self.filter(Post.objects.all(), query)
+        if after:
+            posts = posts.filter(pk__gt=after[1]).order_by('pk')
+        elif before:
+            posts = posts.filter(pk__lt=before[1]).order_by('-pk')
+        else:
+            posts = posts.order_by('pk')
+        rows = [(pk, 0.0) for pk in posts.values_list('pk', flat=True)[:limit]]
+        if before:
+            rows.reverse()
+        return rows
+
+    def filter(self, queryset, query):
+        words = WORDS.findall(query)
+        if not words:
+            return queryset.none()
+        for word in words:
+            queryset = queryset.filter(text__icontains=word)
+        return queryset
+
+
+@lru_cache(maxsize=None)
+def get_backend():
+    return import_string(settings.POSTS_SEARCH_BACKEND)()
+
+
+@task
+def index_post(post_id):
+    """Обновляет запись в индексе; удалённую запись из индекса убирает."""
+    from .models import Post
+    text = Post.objects.filter(pk=post_id).values_list(
+        'text', flat=True).first()
+    if text is None:
+        get_backend().remove([post_id])
+    else:
+        get_backend().index([(post_id, text)])
+
+
+def index_posts(queryset, batch_size=1000):
+    """Индексирует записи пачками по ключу id; возвращает их число."""
+    backend = get_backend()
+    rows = queryset.order_by('pk').values_list('pk', 'text')
+    last_pk, total = 0, 0
+    while True:
+        batch = list(rows.filter(pk__gt=last_pk)[:batch_size])
+        if not batch:
+            return total
+        with transaction.atomic():
+            backend.index(batch)
+        last_pk = batch[-1][0]
+        total += len(batch)
+
+
+class SearchPaginator:
+    """Курсорная навигация по результатам поиска в порядке релевантности."""
+
+    def __init__(self, queryset, query, per_page, backend=None):
+        self.queryset = queryset
+        self.query = query
+        self.per_page = int(per_page)
+        self.backend = backend or get_backend()
+
+    def cursor_for(self, obj):
+        return encode_search_cursor(obj.search_rank, obj.pk)
+
+    def page(self, after=None, before=None):
+        after = after and decode_search_cursor(after)
+        before = before and decode_search_cursor(before)
+        rows = self.backend.search(self.query, self.per_page + 1,
+                                   after=after, before=before)
+        has_more = len(rows) > self.per_page
+        rows = rows[1:] if before and has_more else rows[:self.per_page]
+        posts = self.queryset.in_bulk([pk for pk, _ in rows])
+        results = []
+        for pk, rank in rows:
+            if pk in posts:
+                posts[pk].search_rank = rank
+                results.append(posts[pk])
+        if before:
+            return KeysetPage(results, self, True, has_more)
+        return KeysetPage(results, self, has_more, bool(after))
+
+    def get_page(self, after=None, before=None):
+        try:
+            return self.page(after=after, before=before)
+        except InvalidPage:
+            return self.page()
@@ -0,0 +1,175 @@
+from django.db.models import DEFERRED
+from django.db.models.signals import (post_delete, post_init, post_save,
+                                      pre_delete, pre_save)
+from django.dispatch import receiver
+
+from .cache import invalidate_feeds, post_feeds
+from .counters import (change_author_posts, change_author_stats,
+                       change_group_posts, change_post_comments,
+                       change_total_posts)
+from .models import Comment, Follow, Group, Post, User
+from .search import index_post
+from .thumbnails import make_thumbnail
+from . import timeline
+
+
+# Поля автора, которые видны в лентах и на страницах записей.
+USER_SHOWN_FIELDS = ('username', 'first_name', 'last_name')
+
+
+def _file_name(value):
+    return getattr(value, 'name', value) or ''
+
+
+@receiver(post_init, sender=Post)
+def remember_saved_fields(sender, instance, **kwargs):
+    # __dict__, а не атрибут: отложенное поле не должно вызывать запрос.
+    instance._saved_group_id = instance.__dict__.get('group_id', DEFERRED)
+    instance._saved_image = _file_name(
+        instance.__dict__.get('image', DEFERRED))
+
+
+@receiver(pre_save, sender=Post)
+def load_saved_fields(sender, instance, **kwargs):
+    if instance._saved_group_id is DEFERRED and instance.pk:
+        instance._saved_group_id = Post.objects.filter(
+            pk=instance.pk).values_list('group_id', flat=True).first()
+    instance._image_changed = False
+    if 'image' not in instance.__dict__:
+        return
+    if instance._saved_image is DEFERRED:
+        instance._saved_image = instance.pk and Post.objects.filter(
+            pk=instance.pk).values_list('image', flat=True).first() or ''
+    if _file_name(instance.image) != instance._saved_image:
+        # Старая миниатюра не подходит к новой картинке.
+        instance._image_changed = True
+        instance.thumbnail = ''
+        instance.thumbnail_width = instance.thumbnail_height = None
+
+
+@receiver(pre_delete, sender=Post)
+def load_counted_fields(sender, instance, **kwargs):
+    # После удаления строки отложенные поля уже не догрузить.
+    deferred = instance.get_deferred_fields() & {'author_id', 'group_id'}
+    if deferred:
+        instance.refresh_from_db(fields=deferred)
+    if instance._saved_group_id is DEFERRED:
+        instance._saved_group_id = instance.group_id
+
+
+@receiver(post_save, sender=Post)
+def count_saved_post(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        change_total_posts(1)
+        change_author_posts(instance.author_id, 1)
+        change_group_posts(instance.group_id, 1)
+        timeline.fan_out_post.delay(instance.pk)
+    elif instance.group_id != instance._saved_group_id:
+        change_group_posts(instance._saved_group_id, -1)
+        change_group_posts(instance.group_id, 1)
+    invalidate_feeds(*post_feeds(instance, instance._saved_group_id))
+    instance._saved_group_id = instance.group_id
+    index_post.delay(instance.pk)
+    if instance._image_changed:
+        instance._saved_image = _file_name(instance.image)
+        if instance.image:
+            make_thumbnail.delay(instance.pk)
+
+
+@receiver(post_delete, sender=Post)
+def count_deleted_post(sender, instance, **kwargs):
+    change_total_posts(-1)
+    change_author_posts(instance.author_id, -1)
+    change_group_posts(instance._saved_group_id, -1)
+    invalidate_feeds(*post_feeds(instance, instance._saved_group_id))
+    index_post.delay(instance.pk)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_group_feed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        invalidate_feeds(f'group:{instance.pk}')
+
+
+def _comment_changed(comment, delta):
+    change_post_comments(comment.post_id, delta)
+    post = Post.objects.only('author_id', 'group_id').filter(
+        pk=comment.post_id).first()
+    if post is not None:
+        invalidate_feeds(*post_feeds(post))
+
+
+@receiver(post_save, sender=Comment)
+def count_comment(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        _comment_changed(instance, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def count_deleted_comment(sender, instance, **kwargs):
+    _comment_changed(instance, -1)
+
+
+def _follow_changed(follow):
+    # Счётчики подписок видны на страницах обоих авторов и их записей.
+    invalidate_feeds(f'author:{follow.author_id}', f'author:{follow.user_id}')
+
+
+@receiver(post_save, sender=Follow)
+def count_follow(sender, instance, created, raw=False, **kwargs):
+    if raw or not created:
+        return
+    change_author_stats(instance.author_id, 'followers_count', 1)
+    change_author_stats(instance.user_id, 'following_count', 1)
+    _follow_changed(instance)
+    timeline.backfill.delay(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def count_unfollow(sender, instance, **kwargs):
+    change_author_stats(instance.author_id, 'followers_count', -1)
+    change_author_stats(instance.user_id, 'following_count', -1)
+    _follow_changed(instance)
+    timeline.drop(instance.user_id, instance.author_id)
+    # Ленты оставшихся подписчиков больше не читают записи автора
+    # при запросе: записи популярного периода раскладываются в них.
+    if timeline.left_popular(instance.author_id):
+        timeline.fan_out_imported.delay(instance.author_id, 0)
+
+
+def _shown_fields(user):
+    return tuple(user.__dict__.get(name, DEFERRED)
+                 for name in USER_SHOWN_FIELDS)
+
+
+@receiver(post_init, sender=User)
+def remember_shown_fields(sender, instance, **kwargs):
+    instance._saved_shown = _shown_fields(instance)
+
+
+def _author_feeds(user):
+    """Ленты, где видны записи автора: его, общая и группы его записей."""
+    group_ids = Post.objects.filter(author_id=user.pk).exclude(
+        group=None).values_list('group_id', flat=True).distinct()
+    return ['index', f'author:{user.pk}',
+            *(f'group:{pk}' for pk in group_ids)]
+
+
+@receiver(post_save, sender=User)
+def invalidate_author_feeds(sender, instance, created, raw=False,
+                            **kwargs):
+    # Вход пользователя сохраняет last_login: ленты от этого не меняются.
+    shown = _shown_fields(instance)
+    if created or raw or shown == instance._saved_shown:
+        return
+    instance._saved_shown = shown
+    invalidate_feeds(*_author_feeds(instance))
+
+
+@receiver(post_delete, sender=User)
+def invalidate_deleted_author(sender, instance, **kwargs):
+    # Записи удаляются вместе с автором и сбрасывают свои ленты сами.
+    invalidate_feeds(f'author:{instance.pk}')
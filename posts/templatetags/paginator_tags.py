@@ -0,0 +1,33 @@
+from django import template
+
+
+register = template.Library()
+
+
+@register.simple_tag
+def page_window(page, on_each_side=2, on_ends=1):
+    """
+    Номера страниц вокруг текущей, первые и последние; None - пропуск.
+
+    Число ссылок не зависит от числа страниц. У курсорных страниц
+    номеров нет - для них окно пустое.
+    """
+    if page.number is None:
+        return []
+    number, num_pages = page.number, page.paginator.num_pages
+    if num_pages <= (on_each_side + on_ends) * 2 + 1:
+        return list(range(1, num_pages + 1))
+    window = []
+    if number > on_each_side + on_ends + 2:
+        window += list(range(1, on_ends + 1))
+        window.append(None)
+        window += list(range(number - on_each_side, number + 1))
+    else:
+        window += list(range(1, number + 1))
+    if number < num_pages - on_each_side - on_ends - 1:
+        window += list(range(number + 1, number + on_each_side + 1))
+        window.append(None)
+        window += list(range(num_pages - on_ends + 1, num_pages + 1))
+    else:
+        window += list(range(number + 1, num_pages + 1))
+    return window
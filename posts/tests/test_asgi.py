@@ -0,0 +1,145 @@
+import asyncio
+from urllib.parse import urlencode
+
+from django.core.cache import cache
+from django.middleware.csrf import _get_new_csrf_token
+from django.test import Client, TransactionTestCase
+from django.urls import reverse
+
+from posts.models import Post, User
+from yatube.asgi import WsgiToAsgi
+from yatube.wsgi import application as wsgi_application
+
+
+def http_scope(method, path, headers=()):
+    return {
+        'type': 'http', 'method': method, 'path': path, 'query_string': b'',
+        'headers': [(b'host', b'testserver'), *headers],
+    }
+
+
+async def receive_nothing():
+    return {'type': 'http.request', 'body': b''}
+
+
+def call(app, method, path, body=b'', headers=()):
+    """Один запрос к ASGI-приложению: (статус, заголовки, части тела)."""
+    scope = http_scope(method, path, headers)
+    messages = [{'type': 'http.request', 'body': body[:5],
+                 'more_body': True},
+                {'type': 'http.request', 'body': body[5:]}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    start, *chunks = sent
+    return (start['status'], dict(start['headers']),
+            [chunk['body'] for chunk in chunks])
+
+
+class AsgiTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.app = WsgiToAsgi(wsgi_application, max_workers=2)
+        self.addCleanup(self.app.close)
+        self.user = User.objects.create_user(username='VasiaBasov',
+                                             password='password')
+        self.post = Post.objects.create(text='Тестовый тест',
+                                        author=self.user)
+
+    def test_page_served_from_thread_pool(self):
+        """Страница отдаётся через пул потоков с заголовками ответа."""
+        status, headers, chunks = call(self.app, 'GET', reverse('index'))
+        self.assertEqual(status, 200)
+        self.assertEqual(headers[b'content-type'],
+                         b'text/html; charset=utf-8')
+        self.assertIn('Тестовый тест', b''.join(chunks).decode())
+
+    def test_request_body_is_passed(self):
+        """Тело запроса из нескольких сообщений доходит до представления."""
+        client = Client()
+        client.force_login(self.user)
+        token = _get_new_csrf_token()
+        cookie = (f"sessionid={client.cookies['sessionid'].value}; "
+                  f'csrftoken={token}')
+        body = urlencode({'text': 'Запись через ASGI'}).encode()
+        status, headers, _ = call(
+            self.app, 'POST', reverse('new_post'), body,
+            [(b'content-type', b'application/x-www-form-urlencoded'),
+             (b'cookie', cookie.encode()),
+             (b'x-csrftoken', token.encode())])
+        self.assertEqual(status, 302)
+        self.assertTrue(
+            Post.objects.filter(text='Запись через ASGI').exists())
+
+    def test_missing_page(self):
+        status, _, _ = call(
+            self.app, 'GET',
+            reverse('post', args=(self.user.username, self.post.id + 1)))
+        self.assertEqual(status, 404)
+
+
+class AsgiDisconnectTests(TransactionTestCase):
+    """Ушедший клиент освобождает единственный поток пула."""
+
+    def setUp(self):
+        cache.clear()
+        self.app = WsgiToAsgi(wsgi_application, max_workers=1)
+        self.addCleanup(self.app.close)
+        user = User.objects.create_user(username='VasiaBasov')
+        for number in range(30):
+            Post.objects.create(text=f'Запись {number}', author=user)
+        client = Client()
+        client.force_login(user)
+        # Выгрузка отдаётся потоком, кусков больше, чем вмещает очередь.
+        self.export = http_scope(
+            'GET', reverse('profile_export', args=(user.username,)),
+            [(b'cookie',
+              f"sessionid={client.cookies['sessionid'].value}".encode())])
+
+    async def next_request(self):
+        """Следующий запрос в том же цикле событий, как на живом сервере."""
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        await asyncio.wait_for(
+            self.app(http_scope('GET', reverse('index')), receive_nothing,
+                     send), 5)
+        return sent[0]['status']
+
+    def test_send_fails(self):
+        async def send(message):
+            if message['type'] == 'http.response.body':
+                raise OSError('Клиент отключился')
+
+        async def main():
+            with self.assertRaises(OSError):
+                await self.app(self.export, receive_nothing, send)
+            return await self.next_request()
+
+        self.assertEqual(asyncio.run(main()), 200)
+
+    def test_request_cancelled(self):
+        async def main():
+            started = asyncio.Event()
+
+            async def send(message):
+                started.set()
+                await asyncio.sleep(10)
+
+            task = asyncio.ensure_future(
+                self.app(self.export, receive_nothing, send))
+            await started.wait()
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+            return await self.next_request()
+
+        self.assertEqual(asyncio.run(main()), 200)
@@ -0,0 +1,169 @@
+import shutil
+import tempfile
+import threading
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connections
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+
+from posts.cache import (feed_version, invalidate_feeds, post_author_id,
+                         stats)
+from posts.counters import TOTAL_POSTS_KEY, change_total_posts
+from posts.models import Group, Post, User
+
+
+INDEX_URL = reverse('index')
+# Файловый кэш вместо memcached/redis: как и они, он общий для процессов,
+# хранит значения в pickle, а incr делает без блокировки.
+SHARED_CACHE = tempfile.mkdtemp()
+
+
+class FeedTagsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='VasiaBasov', first_name='Вася', last_name='Басов')
+        cls.group = Group.objects.create(
+            title='Тестовый заголовок', slug='test-slug',
+            description='Описание тестовой группы')
+        cls.post = Post.objects.create(
+            text='Тестовый тест', author=cls.user, group=cls.group)
+        cls.GROUP_URL = reverse('group', args=(cls.group.slug,))
+        cls.USER_URL = reverse('profile', args=(cls.user.username,))
+
+    def setUp(self):
+        cache.clear()
+        stats.clear()
+        self.guest_client = Client()
+
+    def counts(self):
+        return {row['name']: (row['hits'], row['misses'],
+                              row['invalidations'])
+                for row in stats.summary()}
+
+    def test_hits_misses_and_invalidations(self):
+        """Счётчики видят попадания, промахи и сбросы по видам меток."""
+        self.guest_client.get(self.GROUP_URL)
+        self.guest_client.get(self.GROUP_URL)
+        self.assertEqual(self.counts(), {'group': (1, 1, 0)})
+        Post.objects.create(text='Новая', author=self.user, group=self.group)
+        self.assertEqual(self.counts(), {
+            'group': (1, 1, 1),
+            'index': (0, 0, 1),
+            'author': (0, 0, 1),
+            'post': (0, 0, 1),
+        })
+        row = {row['name']: row for row in stats.summary()}['group']
+        self.assertEqual(row['hit_rate'], 0.5)
+
+    @override_settings(FEED_VERSION_TIMEOUT=60)
+    def test_version_keys_expire(self):
+        """Версии лент и авторы записей не хранятся в кэше вечно."""
+        feed_version('index')
+        invalidate_feeds(f'post:{self.post.pk}')
+        post_author_id(self.post.pk, lambda: self.post)
+        keys = ['feed:index:version', 'feed:index:modified',
+                f'feed:post:{self.post.pk}:version',
+                f'feed:post:{self.post.pk}:modified',
+                f'post:{self.post.pk}:author']
+        self.assertEqual(len(cache.get_many(keys)), len(keys))
+        later = time.time() + 61
+        with mock.patch('django.core.cache.backends.locmem.time.time',
+                        return_value=later):
+            self.assertEqual(cache.get_many(keys), {})
+
+    def test_author_rename_refreshes_feeds(self):
+        """Новое имя автора сразу видно во всех лентах с его записями."""
+        urls = (INDEX_URL, self.GROUP_URL, self.USER_URL)
+        for url in urls:
+            self.guest_client.get(url)
+        self.user.first_name = 'Василий'
+        self.user.save()
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertContains(self.guest_client.get(url),
+                                    'Василий Басов')
+
+    def test_login_keeps_feeds(self):
+        """Вход меняет только last_login и ленты не сбрасывает."""
+        Client().force_login(self.user)
+        self.user.is_staff = True
+        self.user.save()
+        self.assertEqual(self.counts(), {})
+
+    def test_deleted_author(self):
+        """Удаление автора сбрасывает его ленту и ленты его записей."""
+        User.objects.get(pk=self.user.pk).delete()
+        self.assertEqual(
+            {name: counts[2] for name, counts in self.counts().items()},
+            {'author': 2, 'index': 1, 'group': 1, 'post': 1})
+
+
+@override_settings(CACHES={'default': {
+    'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+    'LOCATION': SHARED_CACHE,
+}})
+class SharedCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='VasiaBasov')
+        cls.post = Post.objects.create(text='Тестовый тест', author=cls.user)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(SHARED_CACHE, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_feed_page_cached_and_invalidated(self):
+        self.guest_client.get(INDEX_URL)
+        with self.assertNumQueries(0):
+            response = self.guest_client.get(INDEX_URL)
+        self.assertContains(response, 'Тестовый тест')
+        Post.objects.create(text='Свежая запись', author=self.user)
+        self.assertContains(self.guest_client.get(INDEX_URL),
+                            'Свежая запись')
+
+    def test_evicted_version_does_not_revive_pages(self):
+        """Версия, вытесненная из кэша, заменяется новой, а не прежней."""
+        before = feed_version('index')
+        cache.delete('feed:index:version')
+        self.assertGreater(feed_version('index'), before)
+        cache.delete('feed:index:version')
+        invalidate_feeds('index')
+        self.assertGreater(feed_version('index'), before)
+
+    def test_concurrent_invalidations(self):
+        """При одновременных сбросах каждый из них меняет версию."""
+        stale = []
+
+        def invalidate():
+            try:
+                for _ in range(20):
+                    before = feed_version('index')
+                    invalidate_feeds('index')
+                    if feed_version('index') == before:
+                        stale.append(before)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=invalidate) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(stale, [])
+
+    def test_counter_not_created_by_incr(self):
+        """Изменение вытесненного счётчика не создаёт его заново."""
+        cache.delete(TOTAL_POSTS_KEY)
+        change_total_posts(1)
+        self.assertIsNone(cache.get(TOTAL_POSTS_KEY))
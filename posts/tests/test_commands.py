@@ -0,0 +1,200 @@
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db.models.query import QuerySet
+from django.conf import settings
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from posts.models import AuthorStats, Follow, Group, Post, User
+from posts.transfer import _RawInsertQuerySet, bulk_create_dated
+
+
+class FeedPlansCommandTests(TestCase):
+    def test_feeds_use_indexes(self):
+        """Запросы всех лент идут по индексам."""
+        call_command('check_feed_plans', stdout=StringIO())
+
+    def test_full_scan_fails(self):
+        """Полный просмотр таблицы или сортировка в памяти - ошибка."""
+        plans = ('2 0 0 SCAN posts_post',
+                 '5 0 0 SEARCH posts_post USING INDEX posts_post_author_id '
+                 '(author_id=?)\n25 0 0 USE TEMP B-TREE FOR ORDER BY')
+        for plan in plans:
+            with self.subTest(plan=plan):
+                with mock.patch.object(QuerySet, 'explain',
+                                       return_value=plan):
+                    with self.assertRaises(CommandError):
+                        call_command('check_feed_plans', stderr=StringIO())
+
+
+class RecountPostsCommandTests(TestCase):
+    def test_recount_repairs_drift(self):
+        """recount_posts исправляет разошедшиеся счётчики."""
+        user = User.objects.create_user(username='VasiaBasov')
+        group = Group.objects.create(title='Группа', slug='group')
+        reader = User.objects.create_user(username='PetrBasov')
+        Post.objects.create(text='Тест', author=user, group=group)
+        Follow.objects.create(user=reader, author=user)
+        AuthorStats.objects.filter(author=user).update(posts_count=7,
+                                                       followers_count=3)
+        Group.objects.filter(pk=group.pk).update(posts_count=0)
+        call_command('recount_posts', stdout=StringIO())
+        group.refresh_from_db()
+        self.assertEqual(user.stats.posts_count, 1)
+        self.assertEqual(user.stats.followers_count, 1)
+        self.assertEqual(reader.stats.following_count, 1)
+        self.assertEqual(group.posts_count, 1)
+
+
+class CompileTemplatesCommandTests(TestCase):
+    def test_templates_compile(self):
+        """Все шаблоны проекта компилируются без ошибок."""
+        call_command('compile_templates', stdout=StringIO())
+
+    def test_broken_template_fails(self):
+        """Синтаксическая ошибка в шаблоне останавливает команду."""
+        with tempfile.TemporaryDirectory() as directory:
+            with open(os.path.join(directory, 'broken.html'), 'w') as file:
+                file.write('{% if %}')
+            templates = [{**settings.TEMPLATES[0], 'DIRS': [directory]}]
+            with override_settings(TEMPLATES=templates):
+                with self.assertRaisesMessage(CommandError, '1'):
+                    call_command('compile_templates', stderr=StringIO())
+
+
+class TransferCommandsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='VasiaBasov')
+        self.group = Group.objects.create(title='Группа', slug='group')
+        Post.objects.create(text='Первая,\n"с кавычками"', author=self.user,
+                            group=self.group)
+        Post.objects.create(text='Вторая', author=self.user)
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def path(self, name):
+        return os.path.join(self.directory.name, name)
+
+    def roundtrip(self, name):
+        """Выгрузка, удаление и загрузка возвращают те же записи."""
+        call_command('export_posts', self.path(name), batch_size=1,
+                     stderr=StringIO())
+        before = list(Post.objects.values_list(
+            'text', 'pub_date', 'author', 'group'))
+        Post.objects.all().delete()
+        call_command('import_posts', self.path(name), batch_size=1,
+                     stdout=StringIO())
+        after = list(Post.objects.values_list(
+            'text', 'pub_date', 'author', 'group'))
+        self.assertEqual(after, before)
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 1)
+        self.assertEqual(AuthorStats.objects.get(author=self.user).posts_count,
+                         2)
+
+    def test_jsonl_roundtrip(self):
+        self.roundtrip('posts.jsonl')
+
+    def test_csv_roundtrip(self):
+        self.roundtrip('posts.csv')
+
+    def test_resume_from_checkpoint(self):
+        """С --resume загрузка продолжается с сохранённой позиции."""
+        call_command('export_posts', self.path('posts.jsonl'),
+                     stderr=StringIO())
+        with open(self.path('checkpoint.json'), 'w') as file:
+            file.write('{"processed": 1, "last_pk": 0}')
+        call_command('import_posts', self.path('posts.jsonl'),
+                     checkpoint=self.path('checkpoint.json'), resume=True,
+                     stdout=StringIO())
+        self.assertEqual(Post.objects.filter(text='Вторая').count(), 2)
+        self.assertEqual(Post.objects.count(), 3)
+
+    def test_import_changes_counters_by_delta(self):
+        """Загрузка прибавляет к счётчикам только загруженные записи."""
+        call_command('export_posts', self.path('posts.jsonl'),
+                     stderr=StringIO())
+        # Счётчики, которые успели поменять записи с сайта, не пересчитываются.
+        AuthorStats.objects.filter(author=self.user).update(posts_count=10)
+        Group.objects.filter(pk=self.group.pk).update(posts_count=5)
+        with mock.patch('posts.counters.recount_posts') as recount:
+            call_command('import_posts', self.path('posts.jsonl'),
+                         stdout=StringIO())
+        recount.assert_not_called()
+        self.assertEqual(AuthorStats.objects.get(author=self.user).posts_count,
+                         12)
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 6)
+
+    def test_unknown_author_is_skipped(self):
+        """Записи неизвестных авторов пропускаются."""
+        with open(self.path('posts.jsonl'), 'w') as file:
+            file.write('{"text": "Чужая", "pub_date": '
+                       '"2021-01-06T00:00:00+00:00", "author": "nobody", '
+                       '"group": null}\n')
+        out = StringIO()
+        call_command('import_posts', self.path('posts.jsonl'), stdout=out)
+        self.assertIn('пропущено без автора: 1', out.getvalue())
+        self.assertFalse(Post.objects.filter(text='Чужая').exists())
+
+    def test_malformed_records_are_skipped(self):
+        """Испорченные строки пропускаются, остальные загружаются."""
+        lines = (
+            '{"text": "Без автора", "pub_date": null}',
+            '{"author": "VasiaBasov", "pub_date": null}',
+            '{"text": "  ", "author": "VasiaBasov"}',
+            '{"text": "Плохая дата", "author": "VasiaBasov", '
+            '"pub_date": "вчера"}',
+            '{"text": "Несуществующая дата", "author": "VasiaBasov", '
+            '"pub_date": "2021-02-30T00:00:00"}',
+            '{"text": "Обрыв строки", "author": "Vasia',
+            '["Не", "словарь"]',
+            '{"text": "Без даты", "author": "VasiaBasov", "group": "group"}',
+        )
+        with open(self.path('posts.jsonl'), 'w') as file:
+            file.write('\n'.join(lines) + '\n')
+        out = StringIO()
+        started = timezone.now()
+        call_command('import_posts', self.path('posts.jsonl'), stdout=out)
+        self.assertIn('Загружено: 1, пропущено без автора: 0, '
+                      'с ошибками: 7', out.getvalue())
+        post = Post.objects.get(text='Без даты')
+        self.assertGreaterEqual(post.pub_date, started)
+        self.assertEqual(post.group, self.group)
+
+    def test_csv_empty_values(self):
+        """Пустой текст в CSV - ошибка строки, пустые дата и группа - нет."""
+        with open(self.path('posts.csv'), 'w', newline='') as file:
+            file.write('id,text,pub_date,author,group\n'
+                       '1,,2021-01-06T00:00:00+00:00,VasiaBasov,\n'
+                       '2,Из CSV,,VasiaBasov,\n'
+                       '3,Короткая строка\n')
+        out = StringIO()
+        call_command('import_posts', self.path('posts.csv'), stdout=out)
+        self.assertIn('Загружено: 1, пропущено без автора: 0, '
+                      'с ошибками: 2', out.getvalue())
+        self.assertIsNone(Post.objects.get(text='Из CSV').group)
+
+    def test_pub_date_kept_only_for_imported_posts(self):
+        """Пока идёт импорт, другие записи получают дату из auto_now_add."""
+        date = timezone.now() - timedelta(days=30)
+        insert = _RawInsertQuerySet._insert
+
+        def insert_meanwhile(queryset, objs, fields, **kwargs):
+            Post.objects.create(text='Новая', author=self.user)
+            return insert(queryset, objs, fields, **kwargs)
+
+        with mock.patch.object(_RawInsertQuerySet, '_insert',
+                               insert_meanwhile):
+            bulk_create_dated([Post(text='Старая', author=self.user,
+                                    pub_date=date)])
+        imported = Post.objects.get(text='Старая')
+        self.assertEqual(imported.pub_date, date)
+        self.assertGreater(imported.updated, date)
+        self.assertGreater(Post.objects.get(text='Новая').pub_date, date)
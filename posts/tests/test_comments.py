@@ -0,0 +1,66 @@
+from django.core.cache import cache
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from posts.models import Comment, Post, User
+
+
+INDEX_URL = reverse('index')
+
+
+class CommentTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='VasiaBasov')
+        self.reader = User.objects.create_user(username='PetrBasov')
+        self.post = Post.objects.create(text='Тестовый тест',
+                                        author=self.author)
+        self.client = Client()
+        self.client.force_login(self.reader)
+        self.POST_URL = reverse('post', args=(self.author.username,
+                                              self.post.id))
+        self.COMMENT_URL = reverse('add_comment', args=(self.author.username,
+                                                        self.post.id))
+
+    def test_authorized_user_comments(self):
+        """Комментарий появляется на странице записи и в счётчике ленты."""
+        guest = Client()
+        for number in range(3):
+            post = Post.objects.create(text=f'Запись {number}',
+                                       author=self.author)
+            Comment.objects.create(post=post, author=self.reader,
+                                   text='Комментарий')
+        guest.get(INDEX_URL)
+        response = self.client.post(self.COMMENT_URL,
+                                    {'text': 'Первый комментарий'})
+        self.assertRedirects(response, self.POST_URL)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 1)
+        self.assertContains(self.client.get(self.POST_URL),
+                            'Первый комментарий')
+        # Счётчики читаются вместе с записями, а не запросом на карточку.
+        with self.assertNumQueries(1):
+            response = guest.get(INDEX_URL)
+        self.assertContains(response, 'Комментариев: 1', count=4)
+
+    def test_guest_cannot_comment(self):
+        """Аноним не может оставить комментарий."""
+        response = Client().post(self.COMMENT_URL, {'text': 'Аноним'})
+        self.assertRedirects(
+            response, f"{reverse('login')}?next={self.COMMENT_URL}")
+        self.assertFalse(Comment.objects.exists())
+
+    def test_comment_pages(self):
+        """Комментарии листаются курсором от старых к новым."""
+        for number in range(12):
+            Comment.objects.create(post=self.post, author=self.reader,
+                                   text=f'Комментарий {number}')
+        first = self.client.get(self.POST_URL).context['page']
+        self.assertEqual([c.text for c in first][:2],
+                         ['Комментарий 0', 'Комментарий 1'])
+        self.assertEqual(len(first), 10)
+        second = self.client.get(
+            self.POST_URL, {'after': first.next_cursor}).context['page']
+        self.assertEqual([c.text for c in second],
+                         ['Комментарий 10', 'Комментарий 11'])
+        self.assertFalse(second.has_next())
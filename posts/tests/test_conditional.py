@@ -0,0 +1,163 @@
+from unittest import skipUnless
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import (TestCase, TransactionTestCase, Client,
+                         override_settings)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post, User
+from posts.tests.test_replicas import ReplicaMixin
+
+
+INDEX_URL = reverse('index')
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='VasiaBasov')
+        cls.reader = User.objects.create_user(username='PetrBasov')
+        cls.group = Group.objects.create(
+            title='Тестовый заголовок', slug='test-slug',
+            description='Описание тестовой группы')
+        cls.post = Post.objects.create(
+            text='Тестовый тест', author=cls.user, group=cls.group)
+        cls.GROUP_URL = reverse('group', args=(cls.group.slug,))
+        cls.USER_URL = reverse('profile', args=(cls.user.username,))
+        cls.POST_URL = reverse('post', args=(cls.user.username,
+                                             cls.post.id))
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def revalidate(self, client, url, response, **headers):
+        return client.get(url, HTTP_IF_NONE_MATCH=response['ETag'],
+                          **headers)
+
+    def test_unchanged_pages_not_modified(self):
+        """Повторный запрос неизменной страницы получает 304 без шаблона."""
+        for url in (INDEX_URL, self.GROUP_URL, self.USER_URL,
+                    self.POST_URL):
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertIn('Last-Modified', response)
+                with CaptureQueriesContext(connection) as queries:
+                    again = self.revalidate(self.guest_client, url,
+                                            response)
+                self.assertEqual(again.status_code, 304)
+                self.assertEqual(again.templates, [])
+                self.assertFalse(
+                    [q for q in queries if 'posts_post' in q['sql']])
+
+    def test_index_revalidation_without_queries(self):
+        """Главная страница проверяется по версии из кэша, без базы."""
+        response = self.guest_client.get(INDEX_URL)
+        with self.assertNumQueries(0):
+            again = self.revalidate(self.guest_client, INDEX_URL, response)
+        self.assertEqual(again.status_code, 304)
+
+    def test_if_modified_since(self):
+        response = self.guest_client.get(self.GROUP_URL)
+        again = self.guest_client.get(
+            self.GROUP_URL,
+            HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(again.status_code, 304)
+
+    def test_changes_give_fresh_page(self):
+        """Новая запись, комментарий и подписка меняют ETag страниц."""
+        pages = {url: self.guest_client.get(url)
+                 for url in (INDEX_URL, self.GROUP_URL, self.USER_URL,
+                             self.POST_URL)}
+        changes = {
+            'запись': (
+                lambda: Post.objects.create(text='Новая', author=self.user,
+                                            group=self.group),
+                (INDEX_URL, self.GROUP_URL, self.USER_URL, self.POST_URL)),
+            'комментарий': (
+                lambda: Comment.objects.create(post=self.post,
+                                               author=self.reader,
+                                               text='Комментарий'),
+                (INDEX_URL, self.GROUP_URL, self.USER_URL, self.POST_URL)),
+            'подписка': (
+                lambda: Follow.objects.create(user=self.reader,
+                                              author=self.user),
+                (self.USER_URL, self.POST_URL)),
+        }
+        for change, (make, urls) in changes.items():
+            make()
+            for url in urls:
+                with self.subTest(change=change, url=url):
+                    again = self.revalidate(self.guest_client, url,
+                                            pages[url])
+                    self.assertEqual(again.status_code, 200)
+                    pages[url] = again
+
+    def test_etag_depends_on_user(self):
+        """Страница пользователя не подходит гостю: ETag у них разный."""
+        response = self.reader_client.get(self.USER_URL)
+        again = self.revalidate(self.guest_client, self.USER_URL, response)
+        self.assertEqual(again.status_code, 200)
+        again = self.revalidate(self.reader_client, self.USER_URL, response)
+        self.assertEqual(again.status_code, 304)
+
+    def test_missing_page(self):
+        response = self.guest_client.get(reverse('group', args=('nope',)))
+        self.assertEqual(response.status_code, 404)
+        self.assertNotIn('ETag', response)
+
+
+@skipUnless(connection.vendor == 'sqlite', 'Реплика - второй файл SQLite')
+@override_settings(DATABASE_REPLICAS=['replica'], REPLICA_PIN_SECONDS=30)
+class ConditionalReplicaTests(ReplicaMixin, TransactionTestCase):
+    def setUp(self):
+        super().setUp()
+        self.author = User.objects.create_user(username='VasiaBasov')
+        self.reader = User.objects.create_user(username='PetrBasov')
+        Post.objects.create(text='Старая запись', author=self.author)
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+        self.USER_URL = reverse('profile', args=(self.author.username,))
+        self.replicate()
+
+    def test_replica_page_has_no_validators(self):
+        """Страница с реплики уходит без ETag: 304 не закрепит старую."""
+        Post.objects.create(text='Новая запись', author=self.author)
+        response = self.reader_client.get(INDEX_URL)
+        self.assertNotContains(response, 'Новая запись')
+        self.assertNotIn('ETag', response)
+        self.assertNotIn('Last-Modified', response)
+        self.replicate()
+        self.assertContains(self.reader_client.get(INDEX_URL),
+                            'Новая запись')
+
+    def test_validated_page_comes_from_primary(self):
+        """Страница с ETag построена по основной базе, вместе с автором."""
+        Post.objects.create(text='Новая запись', author=self.author)
+        Follow.objects.create(user=self.reader, author=self.author)
+        guest_client = Client()
+        response = guest_client.get(self.USER_URL)
+        self.assertIn('ETag', response)
+        self.assertContains(response, 'Новая запись')
+        self.assertContains(response, 'Подписчиков: 1')
+        self.replicate()
+        again = guest_client.get(self.USER_URL,
+                                 HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(again.status_code, 304)
+
+    def test_pinned_user_revalidates(self):
+        """Пользователь, закреплённый за основной базой, получает ETag."""
+        author_client = Client()
+        author_client.force_login(self.author)
+        author_client.post(reverse('new_post'), {'text': 'Свежая запись'})
+        response = author_client.get(INDEX_URL)
+        self.assertContains(response, 'Свежая запись')
+        again = author_client.get(INDEX_URL,
+                                  HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(again.status_code, 304)
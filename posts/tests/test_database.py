@@ -0,0 +1,93 @@
+import threading
+from unittest import skipUnless
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, connections, transaction
+from django.test import Client, TransactionTestCase
+from django.urls import reverse
+
+from posts.models import Post, User
+
+
+NEW_URL = reverse('new_post')
+WRITERS = 8
+POSTS_PER_WRITER = 10
+SYNCHRONOUS = {'OFF': 0, 'NORMAL': 1, 'FULL': 2, 'EXTRA': 3}
+
+
+def run_concurrently(target, arguments):
+    """Запускает target в потоке на каждый аргумент; возвращает ошибки."""
+    barrier = threading.Barrier(len(arguments))
+    errors = []
+
+    def run(argument):
+        try:
+            barrier.wait()
+            target(argument)
+        except Exception as error:
+            errors.append(error)
+        finally:
+            connections.close_all()
+
+    threads = [threading.Thread(target=run, args=(argument,))
+               for argument in arguments]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return errors
+
+
+@skipUnless(connection.vendor == 'sqlite', 'Настройки SQLite')
+class SQLiteTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_pragmas_applied_on_connect(self):
+        """Новое соединение получает PRAGMA из настроек."""
+        pragmas = settings.DATABASES['default']['OPTIONS']['pragmas']
+        with connection.cursor() as cursor:
+            for name in ('synchronous', 'busy_timeout', 'mmap_size'):
+                with self.subTest(pragma=name):
+                    cursor.execute(f'PRAGMA {name}')
+                    value = cursor.fetchone()[0]
+                    expected = pragmas[name]
+                    if name == 'synchronous':
+                        expected = SYNCHRONOUS[expected.upper()]
+                    self.assertEqual(value, expected)
+            if not connection.is_in_memory_db():
+                cursor.execute('PRAGMA journal_mode')
+                self.assertEqual(cursor.fetchone()[0],
+                                 pragmas['journal_mode'].lower())
+
+    def test_concurrent_writers(self):
+        """Одновременные авторы записей не получают "database is locked"."""
+        clients = []
+        for number in range(WRITERS):
+            client = Client()
+            client.force_login(
+                User.objects.create_user(username=f'Writer{number}'))
+            clients.append(client)
+
+        def write(client):
+            for number in range(POSTS_PER_WRITER):
+                response = client.post(NEW_URL, {'text': f'Запись {number}'})
+                self.assertEqual(response.status_code, 302)
+
+        self.assertEqual(run_concurrently(write, clients), [])
+        self.assertEqual(Post.objects.count(), WRITERS * POSTS_PER_WRITER)
+
+    def test_read_then_write_transactions(self):
+        """Транзакция, которая сначала читает, дожидается записи."""
+        users = [User.objects.create_user(username=f'Reader{number}')
+                 for number in range(WRITERS)]
+
+        def write(user):
+            for number in range(POSTS_PER_WRITER):
+                with transaction.atomic():
+                    count = Post.objects.filter(author=user).count()
+                    Post.objects.create(text=f'Запись {count}', author=user)
+
+        self.assertEqual(run_concurrently(write, users), [])
+        self.assertEqual(Post.objects.count(), WRITERS * POSTS_PER_WRITER)
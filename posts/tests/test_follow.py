@@ -0,0 +1,152 @@
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+
+from posts.models import AuthorStats, FeedEntry, Follow, Post, User
+from posts.timeline import fan_out_post
+
+
+FOLLOW_URL = reverse('follow_index')
+
+
+class FollowTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='VasiaBasov')
+        self.reader = User.objects.create_user(username='PetrBasov')
+        self.client = Client()
+        self.client.force_login(self.reader)
+        self.PROFILE_URL = reverse('profile', args=(self.author.username,))
+
+    def follow(self):
+        self.client.get(reverse('profile_follow',
+                                args=(self.author.username,)))
+
+    def publish(self, text):
+        return Post.objects.create(text=text, author=self.author)
+
+    def test_follow_and_unfollow(self):
+        """Подписка и отписка меняют счётчики в карточке автора."""
+        self.follow()
+        self.follow()
+        self.assertEqual(Follow.objects.count(), 1)
+        self.assertEqual(
+            AuthorStats.objects.get(author=self.author).followers_count, 1)
+        self.assertEqual(
+            AuthorStats.objects.get(author=self.reader).following_count, 1)
+        response = self.client.get(self.PROFILE_URL)
+        self.assertContains(response, 'Подписчиков: 1')
+        self.assertContains(response, 'Отписаться')
+        self.client.get(reverse('profile_unfollow',
+                                args=(self.author.username,)))
+        self.assertFalse(Follow.objects.exists())
+        self.assertContains(self.client.get(self.PROFILE_URL),
+                            'Подписчиков: 0')
+
+    def test_cannot_follow_self(self):
+        """На себя подписаться нельзя."""
+        self.client.get(reverse('profile_follow',
+                                args=(self.reader.username,)))
+        self.assertFalse(Follow.objects.exists())
+
+    def test_new_post_fans_out_to_followers(self):
+        """Новая запись попадает в ленту подписчика и только в неё."""
+        self.follow()
+        self.publish('Запись для подписчиков')
+        self.assertContains(self.client.get(FOLLOW_URL),
+                            'Запись для подписчиков')
+        stranger = Client()
+        stranger.force_login(User.objects.create_user(username='Stranger'))
+        self.assertNotContains(stranger.get(FOLLOW_URL),
+                               'Запись для подписчиков')
+
+    def test_follow_refreshes_cached_profile(self):
+        """Закэшированный для гостей профиль показывает новый счётчик."""
+        guest = Client()
+        self.assertContains(guest.get(self.PROFILE_URL), 'Подписчиков: 0')
+        self.follow()
+        self.assertContains(guest.get(self.PROFILE_URL), 'Подписчиков: 1')
+        self.client.get(reverse('profile_unfollow',
+                                args=(self.author.username,)))
+        self.assertContains(guest.get(self.PROFILE_URL), 'Подписчиков: 0')
+
+    def test_imported_posts_fan_out_to_followers(self):
+        """Загруженные командой записи попадают в ленты подписчиков."""
+        self.follow()
+        second = User.objects.create_user(username='SidorBasov')
+        Follow.objects.create(user=second, author=self.author)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'posts.jsonl')
+            with open(path, 'w') as file:
+                for number in range(3):
+                    file.write(f'{{"text": "Загруженная {number}", '
+                               f'"author": "VasiaBasov"}}\n')
+            with mock.patch('posts.timeline.FANOUT_BATCH', 2):
+                call_command('import_posts', path, stdout=StringIO())
+        self.assertEqual(FeedEntry.objects.filter(user=self.reader).count(),
+                         3)
+        self.assertEqual(FeedEntry.objects.filter(user=second).count(), 3)
+        self.assertContains(self.client.get(FOLLOW_URL), 'Загруженная 2')
+
+    def test_follow_backfills_and_unfollow_drops_feed(self):
+        """Новый подписчик видит прежние записи, отписавшийся - нет."""
+        self.publish('Старая запись')
+        self.follow()
+        self.assertEqual(FeedEntry.objects.filter(user=self.reader).count(), 1)
+        self.client.get(reverse('profile_unfollow',
+                                args=(self.author.username,)))
+        self.assertFalse(FeedEntry.objects.exists())
+
+    @override_settings(FOLLOW_FANOUT_LIMIT=1)
+    def test_popular_author_is_read_on_request(self):
+        """Записи популярного автора не раскладываются, а читаются в ленте."""
+        self.follow()
+        post = Post.objects.create(text='Запись популярного автора',
+                                   author=self.author)
+        self.assertEqual(fan_out_post(post.pk), 0)
+        self.assertFalse(FeedEntry.objects.exists())
+        self.assertContains(self.client.get(FOLLOW_URL),
+                            'Запись популярного автора')
+
+    @override_settings(FOLLOW_FANOUT_LIMIT=2)
+    def test_author_leaving_popular_keeps_feed(self):
+        """После отписки ниже порога записи популярного периода видны."""
+        self.follow()
+        second = User.objects.create_user(username='SidorBasov')
+        Follow.objects.create(user=second, author=self.author)
+        self.publish('Запись популярного периода')
+        self.assertFalse(FeedEntry.objects.exists())
+        other = Client()
+        other.force_login(second)
+        other.get(reverse('profile_unfollow', args=(self.author.username,)))
+        self.assertContains(self.client.get(FOLLOW_URL),
+                            'Запись популярного периода')
+        self.assertNotContains(other.get(FOLLOW_URL),
+                               'Запись популярного периода')
+
+    def test_follow_feed_pages_merge_sources(self):
+        """Разложенные и прочитанные при запросе записи идут одной лентой."""
+        popular = User.objects.create_user(username='Popular')
+        self.follow()
+        Follow.objects.create(user=self.reader, author=popular)
+        AuthorStats.objects.filter(author=popular).update(
+            followers_count=1000)
+        texts = []
+        for number in range(15):
+            if number % 2:
+                Post.objects.create(text=f'Запись {number}', author=popular)
+            else:
+                self.publish(f'Запись {number}')
+            texts.append(f'Запись {number}')
+        first = self.client.get(FOLLOW_URL).context['page']
+        second = self.client.get(
+            FOLLOW_URL, {'after': first.next_cursor}).context['page']
+        shown = [post.text for post in first] + [post.text for post in second]
+        self.assertEqual(shown, texts[::-1])
+        self.assertFalse(second.has_next())
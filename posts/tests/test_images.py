@@ -0,0 +1,83 @@
+import io
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from posts.models import Post, User
+from posts.thumbnails import make_thumbnail
+
+
+TEMP_MEDIA = tempfile.mkdtemp()
+INDEX_URL = reverse('index')
+NEW_URL = reverse('new_post')
+
+
+def image_file(name='small.png', color='red', size=(1200, 800)):
+    output = io.BytesIO()
+    Image.new('RGB', size, color).save(output, 'PNG')
+    return SimpleUploadedFile(name, output.getvalue(),
+                              content_type='image/png')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA, POST_THUMBNAIL_SIZE=(300, 300))
+class PostImageTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_MEDIA, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='VasiaBasov')
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def publish(self, text, image):
+        self.client.post(NEW_URL, {'text': text, 'image': image})
+        return Post.objects.get(text=text)
+
+    def test_identical_uploads_are_stored_once(self):
+        """Одинаковые картинки хранятся одним файлом с именем по хэшу."""
+        first = self.publish('Первая', image_file('one.png'))
+        second = self.publish('Вторая', image_file('two.png'))
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertRegex(first.image.name,
+                         r'^posts/\w\w/\w\w/[0-9a-f]{64}\.png$')
+        directory = os.path.dirname(first.image.path)
+        self.assertEqual(len(os.listdir(directory)), 1)
+
+    def test_thumbnail_is_rendered_without_opening_files(self):
+        """Лента берёт размеры миниатюры из записи, не открывая файл."""
+        post = self.publish('С картинкой', image_file())
+        self.assertEqual((post.thumbnail_width, post.thumbnail_height),
+                         (300, 200))
+        with mock.patch('django.core.files.storage.FileSystemStorage._open',
+                        side_effect=AssertionError('файл открыт')):
+            response = self.client.get(INDEX_URL)
+        self.assertContains(response, f'src="{post.thumbnail.url}"')
+        self.assertContains(response, 'width="300" height="200"')
+
+    def test_new_image_replaces_thumbnail(self):
+        """После замены картинки миниатюра готовится заново."""
+        post = self.publish('С картинкой', image_file())
+        old_thumbnail = post.thumbnail.name
+        self.client.post(
+            reverse('post_edit', args=(self.user.username, post.pk)),
+            {'text': 'С картинкой', 'image': image_file(color='blue')})
+        post.refresh_from_db()
+        self.assertNotEqual(post.thumbnail.name, old_thumbnail)
+
+    @override_settings(TASKS_EAGER=False)
+    def test_thumbnail_is_made_outside_request(self):
+        """Без TASKS_EAGER запрос не ждёт миниатюру."""
+        post = self.publish('С картинкой', image_file())
+        self.assertFalse(post.thumbnail)
+        self.assertIsNone(post.thumbnail_width)
+        self.assertTrue(make_thumbnail(post.pk))
@@ -1,7 +1,8 @@
 from django.test import TestCase, Client
+from django.urls import reverse
 
 from posts.forms import PostForm
-from posts.models import Group, Post, User
+from posts.models import AuthorStats, Group, Post, User
 
 
 class ModelTest(TestCase):
@@ -91,9 +92,58 @@ class ModelTest(TestCase):
         expected_object_name = post.text
         self.assertEqual(expected_object_name, str(post))
 
+    def test_str_keeps_post_text(self):
+        """__str__ сокращает длинный текст, не меняя сам пост."""
+        text = ' '.join(f'слово{i}' for i in range(20))
+        post = Post(text=text, author=ModelTest.user_author)
+        self.assertEqual(str(post), ' '.join(text.split()[:10]) + '…')
+        self.assertEqual(post.text, text)
+        post.text = 'Новый текст'
+        self.assertEqual(str(post), 'Новый текст')
+
     def test_object_name_is_title_fild(self):
         """В поле __str__  объекта group
            записано значение поля group.title."""
         group = ModelTest.group
         expected_object_name = group.title
         self.assertEqual(expected_object_name, str(group))
+
+
+class CountersTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='VasiaBasov')
+        cls.group = Group.objects.create(title='Первая', slug='first')
+        cls.other_group = Group.objects.create(title='Вторая', slug='second')
+
+    def assertCounts(self, author, group, other_group):
+        self.group.refresh_from_db()
+        self.other_group.refresh_from_db()
+        self.assertEqual(AuthorStats.objects.get(author=self.user).posts_count,
+                         author)
+        self.assertEqual(self.group.posts_count, group)
+        self.assertEqual(self.other_group.posts_count, other_group)
+
+    def test_counters_follow_post_changes(self):
+        """Счётчики меняются при создании, переносе и удалении записи."""
+        post = Post.objects.create(text='Тест', author=self.user,
+                                   group=self.group)
+        Post.objects.create(text='Тест', author=self.user)
+        self.assertCounts(2, 1, 0)
+        post.group = self.other_group
+        post.save()
+        self.assertCounts(2, 0, 1)
+        Post.objects.only('text').get(pk=post.pk).delete()
+        self.assertCounts(1, 0, 0)
+
+    def test_post_edit_moves_group_counter(self):
+        """Смена группы в post_edit переносит запись между счётчиками."""
+        post = Post.objects.create(text='Тест', author=self.user,
+                                   group=self.group)
+        client = Client()
+        client.force_login(self.user)
+        client.post(
+            reverse('post_edit', args=(self.user.username, post.id)),
+            {'text': 'Новый текст', 'group': self.other_group.id})
+        self.assertCounts(1, 0, 1)
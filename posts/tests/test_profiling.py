@@ -0,0 +1,67 @@
+from django.core.cache import cache
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+
+from posts.cache import stats as cache_stats
+from posts.models import Post, User
+from yatube.profiling import stats
+
+
+INDEX_URL = reverse('index')
+STATS_URL = reverse('profiling_stats')
+
+
+class ProfilingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        stats.clear()
+        self.user = User.objects.create_user(username='VasiaBasov')
+        Post.objects.create(text='Тестовый тест', author=self.user)
+        self.guest_client = Client()
+
+    def test_no_headers_without_sampling(self):
+        """Без выборки запросы не замеряются."""
+        response = self.guest_client.get(INDEX_URL)
+        self.assertNotIn('Server-Timing', response)
+        self.assertEqual(stats.summary(), [])
+
+    @override_settings(PROFILING_SAMPLE_RATE=1)
+    def test_sampled_request_has_server_timing(self):
+        """Замер попадает в Server-Timing и в статистику по имени URL."""
+        response = self.guest_client.get(INDEX_URL)
+        self.assertRegex(
+            response['Server-Timing'],
+            r'^db;dur=[\d.]+;desc="SQL x2", tpl;dur=[\d.]+, total;dur=[\d.]+$')
+        self.guest_client.get(
+            reverse('profile', args=(self.user.username,)))
+        rows = {row['name']: row for row in stats.summary()}
+        self.assertEqual(set(rows), {'index', 'profile'})
+        self.assertEqual(rows['index']['metrics']['queries']['max'], 2)
+        self.assertGreater(rows['index']['metrics']['template']['max'], 0)
+
+    @override_settings(PROFILING_SAMPLE_RATE=1)
+    def test_stats_page_only_for_staff(self):
+        """Страница статистики открыта только персоналу."""
+        response = self.guest_client.get(STATS_URL)
+        self.assertEqual(response.status_code, 302)
+        self.user.is_staff = True
+        self.user.save()
+        staff = Client()
+        staff.force_login(self.user)
+        staff.get(INDEX_URL)
+        response = staff.get(STATS_URL)
+        self.assertContains(response, '<td>index</td>', html=False)
+
+    def test_stats_page_shows_cache_counters(self):
+        """На странице статистики есть счётчики кэша лент."""
+        cache_stats.clear()
+        self.guest_client.get(INDEX_URL)
+        self.guest_client.get(INDEX_URL)
+        self.user.is_staff = True
+        self.user.save()
+        staff = Client()
+        staff.force_login(self.user)
+        response = staff.get(STATS_URL)
+        self.assertEqual(response.context['cache_rows'], [{
+            'name': 'index', 'hits': 1, 'misses': 1, 'invalidations': 0,
+            'hit_rate': 0.5}])
@@ -0,0 +1,60 @@
+import os
+import tempfile
+
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from posts.models import Post, User
+from yatube.query_snapshot import QueryRecorder, Snapshot, normalize
+
+
+class QuerySnapshotTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'queries.json')
+
+    def test_normalize_drops_values(self):
+        """Запросы, отличающиеся только значениями, совпадают."""
+        self.assertEqual(
+            normalize("SELECT 1 FROM t WHERE a = 'x' AND b IN (%s, %s)"),
+            normalize('SELECT 5 FROM t WHERE a = \'y\' AND b IN (%s)'))
+        self.assertEqual(normalize('SAVEPOINT "s1402_x7"'),
+                         'SAVEPOINT "s?"')
+
+    def test_recorder_groups_queries_by_url(self):
+        """Запросы записываются под методом и именем URL."""
+        user = User.objects.create_user(username='VasiaBasov')
+        Post.objects.create(text='Тестовый тест', author=user)
+        with QueryRecorder() as recorder:
+            Client().get(reverse('profile', args=(user.username,)))
+        summary = recorder.summary()
+        self.assertEqual(list(summary), ['GET profile'])
+        self.assertEqual(summary['GET profile']['count'],
+                         len(recorder.requests[0][1]))
+
+    def test_snapshot_catches_regressions(self):
+        """Больше запросов или новый повтор - нарушение."""
+        base = {'GET index': {'count': 2, 'sql': ['a', 'b'],
+                              'duplicates': []}}
+        snapshot = Snapshot(self.path, update=True)
+        self.assertEqual(snapshot.check('test', base), [])
+        snapshot.save()
+
+        snapshot = Snapshot(self.path, update=False)
+        self.assertEqual(snapshot.check('test', base), [])
+        worse = {'GET index': {'count': 3, 'sql': ['a', 'b'],
+                               'duplicates': ['b']}}
+        self.assertEqual(len(snapshot.check('test', worse)), 2)
+        self.assertEqual(snapshot.data['test'], base)
+
+    def test_missing_entries_fail_without_update(self):
+        """Теста или URL нет в снимке - нарушение, файл не переписывается."""
+        snapshot = Snapshot(self.path, update=False)
+        fresh = {'GET group': {'count': 9, 'sql': ['c'],
+                               'duplicates': ['c']}}
+        problems = snapshot.check('test', fresh)
+        self.assertEqual(len(problems), 1)
+        self.assertIn('QUERY_SNAPSHOT_UPDATE=1', problems[0])
+        snapshot.save()
+        self.assertFalse(os.path.exists(self.path))
@@ -0,0 +1,100 @@
+import os
+import sqlite3
+import tempfile
+from unittest import skipUnless
+
+from django.core.cache import cache
+from django.db import connection, connections
+from django.test import Client, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post, User
+from yatube.routers import PIN_COOKIE
+
+
+INDEX_URL = reverse('index')
+NEW_URL = reverse('new_post')
+
+
+class ReplicaMixin:
+    """
+    Примесь к TransactionTestCase: основная база и реплика - два файла
+    SQLite. Реплика получает данные только в replicate().
+    """
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.replica_path = os.path.join(directory.name, 'replica.sqlite3')
+        connections.databases['replica'] = {
+            **connections.databases['default'], 'NAME': self.replica_path}
+        self.addCleanup(self.drop_replica)
+
+    def replicate(self):
+        """Переносит на реплику текущее состояние основной базы."""
+        connections['default'].ensure_connection()
+        target = sqlite3.connect(self.replica_path)
+        connections['default'].connection.backup(target)
+        target.close()
+
+    def drop_replica(self):
+        connections['replica'].close()
+        del connections._connections.replica
+        del connections.databases['replica']
+
+
+@skipUnless(connection.vendor == 'sqlite', 'Реплика - второй файл SQLite')
+@override_settings(DATABASE_REPLICAS=['replica'], REPLICA_PIN_SECONDS=30)
+class ReplicaTests(ReplicaMixin, TransactionTestCase):
+    def setUp(self):
+        super().setUp()
+        self.author = User.objects.create_user(username='VasiaBasov')
+        self.reader = User.objects.create_user(username='PetrBasov')
+        Post.objects.create(text='Старая запись', author=self.author)
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+        self.replicate()
+
+    def test_get_reads_from_replica(self):
+        """GET-запрос читает с реплики и не видит неперенесённых записей."""
+        Post.objects.create(text='Новая запись', author=self.author)
+        response = self.reader_client.get(INDEX_URL)
+        self.assertContains(response, 'Старая запись')
+        self.assertNotContains(response, 'Новая запись')
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+        self.replicate()
+        self.assertContains(self.reader_client.get(INDEX_URL),
+                            'Новая запись')
+
+    def test_author_reads_primary_after_write(self):
+        """Автор сразу видит свою запись, остальные - после репликации."""
+        response = self.author_client.post(NEW_URL, {'text': 'Свежая запись'})
+        self.assertEqual(response.cookies[PIN_COOKIE]['max-age'], 30)
+        replica = sqlite3.connect(self.replica_path)
+        self.addCleanup(replica.close)
+        self.assertEqual(
+            replica.execute('SELECT COUNT(*) FROM posts_post').fetchone(),
+            (1,))
+        self.assertContains(self.author_client.get(INDEX_URL),
+                            'Свежая запись')
+        self.assertNotContains(self.reader_client.get(INDEX_URL),
+                               'Свежая запись')
+
+    def test_anonymous_cache_filled_from_primary(self):
+        """Кэш лент заполняется из основной базы, а не с реплики."""
+        Post.objects.create(text='Новая запись', author=self.author)
+        self.assertContains(Client().get(INDEX_URL), 'Новая запись')
+
+
+@override_settings(DATABASE_REPLICAS=[])
+class NoReplicaTests(TransactionTestCase):
+    def test_no_pin_cookie_without_replicas(self):
+        """Без реплик кука закрепления не ставится."""
+        client = Client()
+        client.force_login(User.objects.create_user(username='VasiaBasov'))
+        response = client.post(NEW_URL, {'text': 'Запись'})
+        self.assertNotIn(PIN_COOKIE, response.cookies)
@@ -0,0 +1,105 @@
+import os
+import runpy
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Post, User
+from posts.search import SimpleBackend, SQLiteFTSBackend
+
+
+SEARCH_URL = reverse('search')
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        self.guest_client = Client()
+        self.user = User.objects.create_user(username='VasiaBasov')
+        self.post = Post.objects.create(text='Кошки гуляют сами по себе',
+                                        author=self.user)
+        Post.objects.create(text='Собаки любят гулять', author=self.user)
+
+    def search(self, query, **params):
+        response = self.guest_client.get(SEARCH_URL, {'q': query, **params})
+        return response.context['page']
+
+    def test_search_finds_posts(self):
+        """Поиск находит записи по словам без учёта регистра."""
+        self.assertEqual(list(self.search('КОШКИ')), [self.post])
+        self.assertEqual(len(self.search('гулять')), 1)
+        self.assertEqual(len(self.search('')), 0)
+
+    def test_query_syntax_is_escaped(self):
+        """Служебные символы FTS5 в запросе не ломают поиск."""
+        self.assertEqual(list(self.search('"кошки"* (')), [self.post])
+
+    def test_ranked_cursor_pages(self):
+        """Результаты листаются курсором по релевантности без повторов."""
+        for number in range(14):
+            Post.objects.create(text='кошки ' * (number + 1),
+                                author=self.user)
+        first = self.search('кошки')
+        second = self.search('кошки', after=first.next_cursor)
+        ranks = [post.search_rank for post in [*first, *second]]
+        self.assertEqual(len(first) + len(second), 15)
+        self.assertEqual(ranks, sorted(ranks))
+        self.assertFalse(second.has_next())
+        back = self.search('кошки', before=second.previous_cursor)
+        self.assertEqual(list(back), list(first))
+
+    def test_index_follows_post_changes(self):
+        """Изменённые и удалённые записи сразу видны в поиске."""
+        self.post.text = 'Попугаи разговаривают'
+        self.post.save()
+        self.assertEqual(len(self.search('кошки')), 0)
+        self.assertEqual(list(self.search('попугаи')), [self.post])
+        self.post.delete()
+        self.assertEqual(len(self.search('попугаи')), 0)
+
+    def test_admin_search_uses_index(self):
+        """Поиск в админке идёт через индекс, а не LIKE по тексту."""
+        admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='admin')
+        self.guest_client.force_login(admin)
+        response = self.guest_client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'кошки'})
+        self.assertEqual(list(response.context['cl'].result_list),
+                         [self.post])
+
+    def test_rebuild_search_index(self):
+        """rebuild_search_index восстанавливает очищенный индекс."""
+        SQLiteFTSBackend().clear()
+        self.assertEqual(len(self.search('кошки')), 0)
+        call_command('rebuild_search_index', batch_size=1, stdout=StringIO())
+        self.assertEqual(list(self.search('кошки')), [self.post])
+
+    def test_simple_backend(self):
+        """Запасной бэкенд без FTS5 ищет по тем же правилам."""
+        backend = SimpleBackend()
+        self.assertEqual(backend.search('гуляют сами', 10),
+                         [(self.post.pk, 0.0)])
+        self.assertEqual(list(backend.filter(Post.objects.all(), 'гуляют')),
+                         [self.post])
+
+    def test_default_backend_follows_database_engine(self):
+        """Без FTS-таблицы SQLite по умолчанию ищет SimpleBackend."""
+        path = os.path.join(settings.BASE_DIR, 'yatube', 'settings',
+                            'base.py')
+        for engine, backend in (('sqlite', 'posts.search.SQLiteFTSBackend'),
+                                ('postgresql', 'posts.search.SimpleBackend'),
+                                ('mysql', 'posts.search.SimpleBackend')):
+            with self.subTest(engine=engine), mock.patch.dict(
+                    os.environ, {'DATABASE_ENGINE': engine}):
+                os.environ.pop('POSTS_SEARCH_BACKEND', None)
+                self.assertEqual(
+                    runpy.run_path(path)['POSTS_SEARCH_BACKEND'], backend)
+
+    def test_search_index_is_sqlite_table(self):
+        """Индекс хранится в виртуальной таблице FTS5."""
+        self.assertIn('posts_post_fts',
+                      connection.introspection.table_names())
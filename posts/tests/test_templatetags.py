@@ -0,0 +1,22 @@
+from django.core.paginator import Paginator
+from django.test import SimpleTestCase
+
+from posts.templatetags.paginator_tags import page_window
+
+
+class PageWindowTests(SimpleTestCase):
+    def test_window_size_is_bounded(self):
+        """Окно страниц не растёт вместе с числом страниц."""
+        paginator = Paginator(range(50000), 10)
+        self.assertEqual(page_window(paginator.page(2500)),
+                         [1, None, 2498, 2499, 2500, 2501, 2502, None, 5000])
+        self.assertEqual(page_window(paginator.page(1)),
+                         [1, 2, 3, None, 5000])
+        self.assertEqual(page_window(paginator.page(5000)),
+                         [1, None, 4998, 4999, 5000])
+
+    def test_short_range_without_gaps(self):
+        """Немного страниц - показываем все без пропусков."""
+        paginator = Paginator(range(70), 10)
+        self.assertEqual(page_window(paginator.page(4)),
+                         [1, 2, 3, 4, 5, 6, 7])
@@ -1,8 +1,11 @@
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from posts.forms import PostForm
-from posts.models import Group, Post, User
+from posts.models import Comment, Group, Post, User
 
 
 INDEX_URL = reverse('index')
@@ -37,6 +40,7 @@ class StaticURLTests(TestCase):
                                                 cls.post.id))
 
     def setUp(self):
+        cache.clear()
         self.guest_client = Client()
         self.authorized_client_VasiaBasov = Client()
         self.authorized_client_PetrBasov = Client()
@@ -96,3 +100,34 @@ class StaticURLTests(TestCase):
         """Проверка редиректа авторизированного пользователя, но не автора."""
         response = self.authorized_client_PetrBasov.get(self.EDIT_AUTHOR)
         self.assertEqual(response.status_code, 302)
+
+    def test_admin_post_changelist(self):
+        """Список записей в админке открывается без полного подсчёта."""
+        admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='admin')
+        self.guest_client.force_login(admin)
+        response = self.guest_client.get(
+            reverse('admin:posts_post_changelist'))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Тестовый тест')
+
+    def test_admin_comment_changelist(self):
+        """Список комментариев не делает запрос на каждую строку."""
+        admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='admin')
+        self.guest_client.force_login(admin)
+        url = reverse('admin:posts_comment_changelist')
+        Comment.objects.create(post=self.post, author=self.user_other,
+                               text='Первый')
+        with CaptureQueriesContext(connection) as one:
+            self.guest_client.get(url)
+        for number in range(3):
+            post = Post.objects.create(text=f'Запись {number}',
+                                       author=self.user_author)
+            Comment.objects.create(post=post, author=self.user_other,
+                                   text=' '.join(['слово'] * 20))
+        with CaptureQueriesContext(connection) as many:
+            response = self.guest_client.get(url)
+        self.assertEqual(len(many), len(one))
+        self.assertContains(response, ' '.join(['слово'] * 10) + '…')
+        self.assertNotContains(response, ' '.join(['слово'] * 11))
@@ -1,19 +1,45 @@
+import os
+from contextlib import contextmanager
+
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
 from django.test import TestCase, Client
 from django.urls import reverse
 from django import forms
 
+from posts.counters import TOTAL_POSTS_KEY, total_posts_count
 from posts.forms import PostForm
 from posts.models import Group, Post, User
+from posts.views import PGR
+from yatube.query_snapshot import QuerySnapshotMixin
 
 
 INDEX_URL = reverse('index')
 NEW_URL = reverse('new_post')
 AUTHOR_URL = reverse('about:author')
 TECH_URL = reverse('about:tech')
+QUERY_SNAPSHOT = os.path.join(os.path.dirname(__file__), 'queries.json')
+
+
+@contextmanager
+def commit_hooks():
+    """
+    Выполняет on_commit, отложенные внутри блока: транзакция TestCase
+    не фиксируется.
+    """
+    start = len(connection.run_on_commit)
+    yield
+    hooks = connection.run_on_commit[start:]
+    del connection.run_on_commit[start:]
+    for _, hook in hooks:
+        hook()
 
 
-class PagesTests(TestCase):
+class PagesTests(QuerySnapshotMixin, TestCase):
+    query_snapshot = QUERY_SNAPSHOT
+
     @classmethod
     def setUpClass(cls):
         super().setUpClass()
@@ -51,6 +77,10 @@ class PagesTests(TestCase):
         cls.EDIT_AUTHOR = reverse('post_edit', args=(cls.user.username,
                                                      cls.post.id))
 
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
     def test_pages_uses_correct_template(self):
         """URL-адрес использует соответствующий шаблон."""
         templates_page_names = {
@@ -145,6 +175,131 @@ class PagesTests(TestCase):
         response = self.authorized_client.get(INDEX_URL)
         self.assertEqual(len(response.context.get('page')), 10)
 
+    def test_keyset_pages_continue_feed(self):
+        """Курсорные страницы продолжают ленту без повторов и пропусков."""
+        for post in range(14):
+            Post.objects.create(text=f'Текст {post}', author=self.user)
+        first = self.authorized_client.get(INDEX_URL).context['page']
+        second = self.authorized_client.get(
+            INDEX_URL, {'after': first.next_cursor}).context['page']
+        self.assertEqual(len(second), 5)
+        self.assertFalse(second.has_next())
+        self.assertEqual(
+            [post.id for post in first] + [post.id for post in second],
+            list(Post.objects.values_list('id', flat=True)))
+        back = self.authorized_client.get(
+            INDEX_URL, {'before': second.previous_cursor}).context['page']
+        self.assertEqual(list(back), list(first))
+        self.assertFalse(back.has_previous())
+
+    def test_keyset_page_with_broken_cursor(self):
+        """Испорченный курсор возвращает первую страницу."""
+        response = self.authorized_client.get(INDEX_URL, {'after': '%%%'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['page'][0], self.post)
+
+    def test_feed_query_budget(self):
+        """Число запросов ленты не зависит от числа постов на странице."""
+        for post in range(14):
+            Post.objects.create(
+                text=f'Текст {post}',
+                author=get_user_model().objects.create(
+                    username=f'Author{post}'),
+                group=self.group,
+            )
+        budgets = {
+            INDEX_URL: 2,
+            self.GROUP_URL: 2,
+            self.USER_URL: 2,
+        }
+        for url, queries in budgets.items():
+            with self.subTest(url=url):
+                with self.assertNumQueries(queries):
+                    self.guest_client.get(url)
+
+    def test_anonymous_feed_is_cached(self):
+        """Повторный запрос ленты анонимом не обращается к базе."""
+        self.guest_client.get(self.GROUP_URL)
+        with self.assertNumQueries(1):
+            response = self.guest_client.get(self.GROUP_URL)
+        self.assertContains(response, 'Тестовый тест')
+
+    def test_feed_cache_invalidated_on_post_changes(self):
+        """Новая и изменённая запись сразу видны в кэшированных лентах."""
+        urls = (INDEX_URL, self.GROUP_URL, self.USER_URL)
+        for url in urls:
+            self.guest_client.get(url)
+        self.authorized_client.post(
+            NEW_URL, {'text': 'Свежая запись', 'group': self.group.id})
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertContains(self.guest_client.get(url),
+                                    'Свежая запись')
+        self.authorized_client.post(
+            self.EDIT_AUTHOR,
+            {'text': 'Перенесённая запись', 'group': self.second_group.id})
+        self.assertContains(self.guest_client.get(self.SECOND_GROUP_URL),
+                            'Перенесённая запись')
+        self.assertNotContains(self.guest_client.get(self.GROUP_URL),
+                               'Перенесённая запись')
+
+    def test_post_card_fragment_follows_updates(self):
+        """Кэш карточки записи сбрасывается при её изменении."""
+        self.authorized_client.get(INDEX_URL)
+        self.authorized_client.post(
+            self.EDIT_AUTHOR, {'text': 'Исправленный текст'})
+        self.assertContains(self.authorized_client.get(INDEX_URL),
+                            'Исправленный текст')
+
+    def test_index_total_comes_from_counter(self):
+        """Главная страница берёт число записей из счётчика, а не COUNT(*)."""
+        self.authorized_client.get(INDEX_URL)
+        with commit_hooks():
+            Post.objects.create(text='Ещё запись', author=self.user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.authorized_client.get(INDEX_URL)
+        self.assertEqual(response.context['paginator'].count, 2)
+        self.assertFalse(
+            [q for q in queries if 'COUNT(' in q['sql'].upper()])
+
+    def test_rolled_back_post_not_counted(self):
+        """Откаченная запись не остаётся в счётчике записей."""
+        self.assertEqual(total_posts_count(), 1)
+        with commit_hooks(), transaction.atomic():
+            Post.objects.create(text='Откаченная запись', author=self.user)
+            transaction.set_rollback(True)
+        self.assertEqual(total_posts_count(), 1)
+
+    def test_stale_total_keeps_pages_working(self):
+        """Завышенный счётчик даёт пустую последнюю страницу, а не ошибку."""
+        cache.set(TOTAL_POSTS_KEY, PGR * 2 + 1)
+        for client in (self.guest_client, self.authorized_client):
+            with self.subTest(client=client):
+                response = client.get(INDEX_URL, {'page': 3})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(response.context['page']), 0)
+                self.assertNotContains(response, '?before=')
+
+    def test_profile_export_streams_posts(self):
+        """Автор скачивает свои записи потоком JSON Lines."""
+        for post in range(3):
+            Post.objects.create(text=f'Текст {post}', author=self.user)
+        response = self.authorized_client.get(
+            reverse('profile_export', args=(self.user.username,)))
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 4)
+        self.assertIn('"author": "VasiaBasov"', lines[0])
+        self.assertIn('"group": "test-slug"', lines[0])
+
+    def test_profile_export_only_for_author(self):
+        """Чужие записи скачать нельзя."""
+        other = Client()
+        other.force_login(User.objects.create_user(username='PetrBasov'))
+        response = other.get(
+            reverse('profile_export', args=(self.user.username,)))
+        self.assertRedirects(response, self.USER_URL)
+
     def test_about_author_url_exists_at_desired_location(self):
         """Страница /author/ доступна любому пользователю."""
         response = self.guest_client.get(AUTHOR_URL)
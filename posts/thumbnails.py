@@ -0,0 +1,47 @@
+import io
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+from tasks import task
+
+from .cache import invalidate_feeds, post_feeds
+from .models import Post
+
+
+def render_thumbnail(file, size):
+    """JPEG, вписанный в size с сохранением пропорций."""
+    with Image.open(file) as image:
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail(size)
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
+        output = io.BytesIO()
+        image.save(output, 'JPEG', quality=85, optimize=True)
+    return ContentFile(output.getvalue()), image.size
+
+
+@task
+def make_thumbnail(post_id):
+    """
+    Готовит миниатюру картинки записи.
+
+    Запись обновляется только если картинка не сменилась, пока
+    миниатюра готовилась; возвращает True, если миниатюра сохранена.
+    """
+    post = Post.objects.filter(pk=post_id).only(
+        'image', 'author_id', 'group_id').first()
+    if post is None or not post.image:
+        return False
+    with post.image.open('rb') as file:
+        content, (width, height) = render_thumbnail(
+            file, settings.POST_THUMBNAIL_SIZE)
+    field = Post._meta.get_field('thumbnail')
+    name = field.storage.save(field.generate_filename(post, 'thumb.jpg'),
+                              content)
+    updated = Post.objects.filter(pk=post_id, image=post.image.name).update(
+        thumbnail=name, thumbnail_width=width, thumbnail_height=height)
+    if updated:
+        invalidate_feeds(*post_feeds(post))
+    return bool(updated)
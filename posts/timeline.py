@@ -0,0 +1,132 @@
+from django.conf import settings
+from django.db.models import F
+
+from tasks import task
+
+from .models import AuthorStats, FeedEntry, Follow, Post
+from .pagination import MergedKeysetPaginator
+
+
+FANOUT_BATCH = 1000
+
+
+def fans_out(author_id):
+    """
+    Раскладываются ли записи автора по лентам подписчиков при публикации.
+
+    Записи авторов с FOLLOW_FANOUT_LIMIT подписчиков и больше
+    подмешиваются в ленты при чтении.
+    """
+    return not AuthorStats.objects.filter(
+        author_id=author_id,
+        followers_count__gte=settings.FOLLOW_FANOUT_LIMIT,
+    ).exists()
+
+
+def left_popular(author_id):
+    """Опустилось ли число подписчиков автора ровно под FOLLOW_FANOUT_LIMIT."""
+    return AuthorStats.objects.filter(
+        author_id=author_id,
+        followers_count=settings.FOLLOW_FANOUT_LIMIT - 1,
+    ).exists()
+
+
+def _entries(user_ids, posts):
+    return [FeedEntry(user_id=user_id, post_id=pk, pub_date=pub_date)
+            for user_id in user_ids for pk, pub_date in posts]
+
+
+def _fan_out(author_id, posts):
+    """
+    Кладёт записи [(pk, pub_date)] в ленты подписчиков автора.
+
+    Подписчики берутся пачками так, чтобы строк в одной вставке было
+    не больше FANOUT_BATCH (или числа записей). Возвращает число
+    подписчиков.
+    """
+    per_batch = max(FANOUT_BATCH // len(posts), 1)
+    followers = Follow.objects.filter(author_id=author_id).order_by(
+        'user_id').values_list('user_id', flat=True)
+    last_id, total = 0, 0
+    while True:
+        batch = list(followers.filter(user_id__gt=last_id)[:per_batch])
+        if not batch:
+            return total
+        FeedEntry.objects.bulk_create(_entries(batch, posts),
+                                      ignore_conflicts=True)
+        last_id = batch[-1]
+        total += len(batch)
+
+
+@task
+def fan_out_post(post_id):
+    """Кладёт запись в ленты подписчиков автора; возвращает их число."""
+    post = Post.objects.filter(pk=post_id).values_list(
+        'author_id', 'pub_date').first()
+    if post is None or not fans_out(post[0]):
+        return 0
+    author_id, pub_date = post
+    return _fan_out(author_id, [(post_id, pub_date)])
+
+
+@task
+def fan_out_imported(author_id, after_pk):
+    """
+    Кладёт в ленты подписчиков записи автора с pk больше after_pk.
+
+    bulk_create не вызывает сигналы, поэтому загрузка записей раскладывает
+    их этим шагом; с after_pk=0 раскладываются записи автора, вышедшие,
+    пока он был популярен. Возвращает число записей.
+    """
+    if not fans_out(author_id):
+        return 0
+    posts = Post.objects.filter(author_id=author_id).order_by(
+        'pk').values_list('pk', 'pub_date')
+    last_pk, total = after_pk, 0
+    while True:
+        batch = list(posts.filter(pk__gt=last_pk)[:FANOUT_BATCH])
+        if not batch:
+            return total
+        _fan_out(author_id, batch)
+        last_pk = batch[-1][0]
+        total += len(batch)
+
+
+@task
+def backfill(user_id, author_id):
+    """Добавляет в ленту нового подписчика последние записи автора."""
+    if not fans_out(author_id):
+        return
+    posts = Post.objects.filter(author_id=author_id).values_list(
+        'pk', 'pub_date')[:settings.FOLLOW_BACKFILL]
+    FeedEntry.objects.bulk_create(_entries([user_id], posts),
+                                  ignore_conflicts=True)
+
+
+def drop(user_id, author_id):
+    """Убирает записи автора из ленты бывшего подписчика."""
+    FeedEntry.objects.filter(user_id=user_id,
+                             post__author_id=author_id).delete()
+
+
+def follow_paginator(user, per_page):
+    """
+    Лента подписок: разложенные записи одним проходом по индексу
+    feed_entry_user_idx и записи популярных авторов, прочитанные
+    по индексу автора.
+    """
+    entries = Post.objects.for_feed().filter(feed_entries__user=user).annotate(
+        feed_date=F('feed_entries__pub_date'),
+        feed_key=F('feed_entries__post_id'),
+    )
+    sources = [entries]
+    popular = list(Follow.objects.filter(
+        user=user,
+        author__stats__followers_count__gte=settings.FOLLOW_FANOUT_LIMIT,
+    ).values_list('author_id', flat=True))
+    if popular:
+        sources.append(Post.objects.for_feed().filter(
+            author_id__in=popular,
+        ).annotate(feed_date=F('pub_date'), feed_key=F('pk')))
+    return MergedKeysetPaginator(sources, per_page, field='feed_date',
+                                 key='feed_key')
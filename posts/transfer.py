@@ -0,0 +1,213 @@
+import csv
+import json
+from collections import Counter, OrderedDict
+
+from django.db import models
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .counters import (change_author_posts, change_group_posts,
+                       change_total_posts)
+from .models import Group, Post, User
+
+
+FIELDS = ('id', 'text', 'pub_date', 'author', 'group')
+FORMATS = ('jsonl', 'csv')
+
+
+def iter_records(queryset, batch_size=1000):
+    """
+    Записи для выгрузки словарями FIELDS в порядке id.
+
+    Пачки выбираются по ключу id, внутри пачки строки читаются
+    итератором, так что в памяти не больше batch_size записей.
+    """
+    rows = queryset.order_by('pk').values_list(
+        'pk', 'text', 'pub_date', 'author__username', 'group__slug')
+    last_pk = 0
+    while True:
+        count = 0
+        batch = rows.filter(pk__gt=last_pk)[:batch_size]
+        for row in batch.iterator(chunk_size=batch_size):
+            count += 1
+            last_pk = row[0]
+            record = dict(zip(FIELDS, row))
+            record['pub_date'] = record['pub_date'].isoformat()
+            yield record
+        if count < batch_size:
+            return
+
+
+def jsonl_line(record):
+    return json.dumps(record, ensure_ascii=False) + '\n'
+
+
+def write_records(records, file, fmt):
+    if fmt == 'csv':
+        writer = csv.DictWriter(file, FIELDS)
+        writer.writeheader()
+        for record in records:
+            writer.writerow(record)
+    else:
+        for record in records:
+            file.write(jsonl_line(record))
+
+
+def read_records(file, fmt):
+    """
+    Записи файла словарями; строка, которую не удалось разобрать, - {}.
+
+    Пустые значения CSV остаются пустыми строками: что из них допустимо,
+    решает clean_record.
+    """
+    if fmt == 'csv':
+        yield from csv.DictReader(file)
+    else:
+        for line in file:
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                record = {}
+            yield record if isinstance(record, dict) else {}
+
+
+def _parse_pub_date(value):
+    if not value:
+        return timezone.now()
+    if not isinstance(value, str):
+        return None
+    try:
+        pub_date = parse_datetime(value)
+    except ValueError:
+        return None
+    if pub_date is not None and timezone.is_naive(pub_date):
+        pub_date = timezone.make_aware(pub_date)
+    return pub_date
+
+
+def clean_record(record):
+    """
+    Проверенная запись импорта или None, если строка испорчена.
+
+    Автор и непустой текст обязательны; без даты запись получает текущее
+    время, пустая группа - это запись без группы.
+    """
+    author, text = record.get('author'), record.get('text')
+    if not isinstance(author, str) or not author:
+        return None
+    if not isinstance(text, str) or not text.strip():
+        return None
+    group = record.get('group') or None
+    if group is not None and not isinstance(group, str):
+        return None
+    pub_date = _parse_pub_date(record.get('pub_date'))
+    if pub_date is None:
+        return None
+    return {'author': author, 'text': text, 'pub_date': pub_date,
+            'group': group}
+
+
+class _RawInsertQuerySet(models.QuerySet):
+    def _insert(self, objs, fields, **kwargs):
+        kwargs['raw'] = True
+        return super()._insert(objs, fields, **kwargs)
+
+
+def bulk_create_dated(posts, batch_size=None):
+    """
+    bulk_create, сохраняющий pub_date записей; без даты - текущее время.
+
+    auto_now_add подставил бы текущее время в pre_save поля. Вставка идёт
+    в режиме raw, как у loaddata: pre_save не вызывается, а общие для
+    всех потоков метаданные поля не меняются. Поэтому и updated, которое
+    заполнило бы auto_now, задаётся здесь.
+    """
+    now = timezone.now()
+    for post in posts:
+        post.pub_date = post.pub_date or now
+        post.updated = now
+    return _RawInsertQuerySet(Post).bulk_create(posts, batch_size=batch_size)
+
+
+class LookupCache:
+    """
+    Ограниченный LRU-кэш «ключ -> id» для внешних ключей импорта.
+
+    Промахи одной пачки разрешаются одним запросом к базе.
+    """
+
+    def __init__(self, queryset, field, size=10000):
+        self.queryset = queryset
+        self.field = field
+        self.size = size
+        self.ids = OrderedDict()
+
+    def resolve(self, keys):
+        missing = {key for key in keys if key not in self.ids}
+        if missing:
+            found = self.queryset.filter(**{f'{self.field}__in': missing})
+            found = dict(found.values_list(self.field, 'pk'))
+            for key in missing:
+                self.ids[key] = found.get(key)
+        result = {}
+        for key in keys:
+            self.ids.move_to_end(key)
+            result[key] = self.ids[key]
+        while len(self.ids) > self.size:
+            self.ids.popitem(last=False)
+        return result
+
+
+class Importer:
+    def __init__(self, batch_size=1000, cache_size=10000):
+        self.batch_size = batch_size
+        self.authors = LookupCache(User.objects.all(), 'username', cache_size)
+        self.groups = LookupCache(Group.objects.all(), 'slug', cache_size)
+        self.author_ids = set()
+        self.group_ids = set()
+        self.created = 0
+        self.skipped = 0
+        self.invalid = 0
+
+    def build(self, batch):
+        records = []
+        for record in map(clean_record, batch):
+            if record is None:
+                self.invalid += 1
+            else:
+                records.append(record)
+        authors = self.authors.resolve({r['author'] for r in records})
+        groups = self.groups.resolve({r['group'] for r in records
+                                      if r['group']})
+        posts = []
+        for record in records:
+            author_id = authors[record['author']]
+            if author_id is None:
+                self.skipped += 1
+                continue
+            group_id = groups.get(record['group'])
+            posts.append(Post(
+                text=record['text'],
+                pub_date=record['pub_date'],
+                author_id=author_id,
+                group_id=group_id,
+            ))
+            self.author_ids.add(author_id)
+            if group_id is not None:
+                self.group_ids.add(group_id)
+        return posts
+
+    def save(self, batch):
+        posts = self.build(batch)
+        bulk_create_dated(posts, self.batch_size)
+        # bulk_create не вызывает сигналы: счётчики меняются приращениями
+        # в той же транзакции, что и вставка, - и при продолжении загрузки
+        # с контрольной точки, и рядом с одновременными записями с сайта.
+        for author_id, count in Counter(p.author_id for p in posts).items():
+            change_author_posts(author_id, count)
+        for group_id, count in Counter(p.group_id for p in posts).items():
+            change_group_posts(group_id, count)
+        change_total_posts(len(posts))
+        self.created += len(posts)
@@ -6,9 +6,19 @@ from . import views
 urlpatterns = [
     path("group/<slug:slug>/", views.group_posts, name="group"),
     path("new/", views.new_post, name="new_post"),
+    path("search/", views.search, name="search"),
+    path("follow/", views.follow_index, name="follow_index"),
     path("", views.index, name="index"),
     path('<str:username>/', views.profile, name='profile'),
+    path('<str:username>/follow/', views.profile_follow,
+         name='profile_follow'),
+    path('<str:username>/unfollow/', views.profile_unfollow,
+         name='profile_unfollow'),
+    path('<str:username>/export.jsonl', views.profile_export,
+         name='profile_export'),
     path('<str:username>/<int:post_id>/', views.post_view, name='post'),
     path('<str:username>/<int:post_id>/edit/', views.post_edit,
          name='post_edit'),
+    path('<str:username>/<int:post_id>/comment/', views.add_comment,
+         name='add_comment'),
 ]
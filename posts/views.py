@@ -1,87 +1,240 @@
-from django.core.paginator import Paginator
+from django.db import transaction
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 
-from .models import Post, Group, User
-from .forms import PostForm
+from .cache import cached_feed, conditional_feed, post_author_id
+from .counters import posts_count, total_posts_count
+from .models import Follow, Post, Group, User
+from .forms import CommentForm, PostForm
+from .pagination import KeysetPaginator, paginate
+from .search import SearchPaginator
+from .timeline import follow_paginator
+from .transfer import iter_records, jsonl_line
 
 
 PGR = 10
+EXPORT_BATCH = 500
 
 
+def _page_object(request, queryset, **lookup):
+    """
+    Объект страницы, один раз за запрос.
+
+    Его ищут и функции условного GET, и само представление.
+    """
+    key = (queryset.model, *sorted(lookup.items()))
+    found = request.__dict__.setdefault('_page_objects', {})
+    if key not in found:
+        found[key] = queryset.filter(**lookup).first()
+    return found[key]
+
+
+def _author(request, username):
+    return _page_object(request, User.objects.select_related('stats'),
+                        username=username)
+
+
+def index_feeds(request):
+    return ['index']
+
+
+def group_feeds(request, slug):
+    group = _page_object(request, Group.objects.all(), slug=slug)
+    return None if group is None else [f'group:{group.pk}']
+
+
+def profile_feeds(request, username):
+    author = _author(request, username)
+    return None if author is None else [f'author:{author.pk}']
+
+
+def _post(request, username, post_id):
+    # Автор со счётчиками приходит вместе с записью: один запрос вместо двух.
+    return _page_object(
+        request, Post.objects.select_related('author__stats', 'group'),
+        id=post_id, author__username=username)
+
+
+def post_feeds(request, username, post_id):
+    author_id = post_author_id(
+        post_id, lambda: _post(request, username, post_id))
+    if author_id is None:
+        return None
+    return [f'author:{author_id}', f'post:{post_id}']
+
+
+@conditional_feed(index_feeds)
 def index(request):
-    latest = Post.objects.all()
-    paginator = Paginator(latest, PGR)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
-    context = {
-        'page': page,
-        'paginator': paginator,
-    }
-    return render(request, "index.html", context)
+    def render_page():
+        latest = Post.objects.for_feed()
+        paginator, page = paginate(request, latest, PGR,
+                                   total_posts_count())
+        context = {
+            'page': page,
+            'paginator': paginator,
+        }
+        return render(request, "index.html", context)
+    return cached_feed(request, 'index', render_page)
 
 
+@conditional_feed(group_feeds)
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
-    posts = Post.objects.filter(group=group).all()
-    paginator = Paginator(posts, PGR)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    group = _page_object(request, Group.objects.all(), slug=slug)
+    if group is None:
+        raise Http404
+
+    def render_page():
+        posts = Post.objects.for_feed().filter(group=group)
+        paginator, page = paginate(request, posts, PGR, group.posts_count)
+        context = {
+            "group": group,
+            "posts": posts,
+            'page': page,
+            'paginator': paginator,
+        }
+        return render(request, "group.html", context)
+    return cached_feed(request, f'group:{group.pk}', render_page)
+
+
+def search(request):
+    query = request.GET.get('q', '').strip()
+    paginator = SearchPaginator(Post.objects.for_feed(), query, PGR)
+    page = paginator.get_page(after=request.GET.get('after'),
+                              before=request.GET.get('before'))
     context = {
-        "group": group,
-        "posts": posts,
+        'query': query,
         'page': page,
         'paginator': paginator,
     }
-    return render(request, "group.html", context)
+    return render(request, 'search.html', context)
 
 
 @login_required
 def new_post(request):
     if request.method == 'POST':
-        form = PostForm(request.POST)
+        form = PostForm(request.POST, request.FILES or None)
         if form.is_valid():
             post = form.save(commit=False)
             post.author = request.user
-            post.save()
+            with transaction.atomic():
+                post.save()
             return redirect('index')
     form = PostForm()
     return render(request, 'new.html', {'form': form, 'is_edit': True})
 
 
+@conditional_feed(profile_feeds)
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    post_list = author.posts.all()
-    paginator = Paginator(post_list, PGR)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    author = _author(request, username)
+    if author is None:
+        raise Http404
+
+    def render_page():
+        count = posts_count(author)
+        post_list = Post.objects.for_feed().filter(author=author)
+        paginator, page = paginate(request, post_list, PGR, count)
+        following = (request.user.is_authenticated
+                     and Follow.objects.filter(user=request.user,
+                                               author=author).exists())
+        context = {
+            'page': page,
+            'author': author,
+            'is_owner': request.user == author,
+            'following': following,
+            'count': paginator.count,
+            'paginator': paginator,
+        }
+        return render(request, 'profile.html', context)
+    return cached_feed(request, f'author:{author.pk}', render_page)
+
+
+@login_required
+def follow_index(request):
+    paginator = follow_paginator(request.user, PGR)
+    page = paginator.get_page(after=request.GET.get('after'),
+                              before=request.GET.get('before'))
     context = {
         'page': page,
-        'author': author,
         'paginator': paginator,
     }
-    return render(request, 'profile.html', context)
+    return render(request, 'follow.html', context)
 
 
-def post_view(request, username, post_id):
+@login_required
+def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
+    if author != request.user:
+        Follow.objects.get_or_create(user=request.user, author=author)
+    return redirect('profile', username)
+
+
+@login_required
+def profile_unfollow(request, username):
+    author = get_object_or_404(User, username=username)
+    Follow.objects.filter(user=request.user, author=author).delete()
+    return redirect('profile', username)
+
+
+@login_required
+def profile_export(request, username):
+    author = get_object_or_404(User, username=username)
+    if request.user != author:
+        return redirect('profile', username)
+    records = iter_records(Post.objects.filter(author=author), EXPORT_BATCH)
+    response = StreamingHttpResponse(
+        (jsonl_line(record) for record in records),
+        content_type='application/x-ndjson; charset=utf-8',
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="{author.username}.jsonl"')
+    return response
+
+
+@conditional_feed(post_feeds)
+def post_view(request, username, post_id):
+    post = _post(request, username, post_id)
+    if post is None:
+        raise Http404
+    author = post.author
     text = Post._meta.get_field("text")
-    post = get_object_or_404(Post, id=post_id, author=author)
-    count = Post.objects.filter(author=author).select_related('author').count()
+    count = posts_count(author) or 0
+    comments = post.comments.select_related('author').only(
+        'text', 'created', 'author__username')
+    paginator = KeysetPaginator(comments, PGR, field='created',
+                                descending=False)
+    page = paginator.get_page(after=request.GET.get('after'),
+                              before=request.GET.get('before'))
     context = {
         'post': post,
         'author': author,
         'count': count,
         'post_id': post_id,
         'text': text,
+        'page': page,
+        'form': CommentForm(),
     }
     return render(request, 'post.html', context)
 
 
+@login_required
+def add_comment(request, username, post_id):
+    post = get_object_or_404(Post, id=post_id, author__username=username)
+    form = CommentForm(request.POST or None)
+    if form.is_valid():
+        comment = form.save(commit=False)
+        comment.post = post
+        comment.author = request.user
+        with transaction.atomic():
+            comment.save()
+    return redirect('post', username, post_id)
+
+
 @login_required
 def post_edit(request, username, post_id):
     post = get_object_or_404(Post, id=post_id, author__username=username)
-    form = PostForm(request.POST or None, instance=post)
+    form = PostForm(request.POST or None, request.FILES or None,
+                    instance=post)
     context = {
         'form': form,
         'is_edit': True,
@@ -89,7 +242,8 @@ def post_edit(request, username, post_id):
     }
     if post.author == request.user:
         if form.is_valid():
-            form.save()
+            with transaction.atomic():
+                form.save()
             return redirect('post', username, post_id)
         return render(request, 'new.html', context)
     return redirect('post', username, post_id)
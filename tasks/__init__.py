@@ -0,0 +1 @@
+from .base import get_broker, task  # noqa: F401
@@ -0,0 +1,13 @@
+from django.contrib import admin
+
+from .models import Job
+
+
+class JobAdmin(admin.ModelAdmin):
+    list_display = ("pk", "name", "attempts", "run_at", "dead", "created")
+    list_filter = ("dead", "name")
+    search_fields = ("name",)
+    empty_value_display = "-пусто-"
+
+
+admin.site.register(Job, JobAdmin)
@@ -0,0 +1,93 @@
+import logging
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+
+logger = logging.getLogger('tasks')
+
+REGISTRY = {}
+
+
+class Task:
+    """
+    Функция, которую можно выполнить в фоне через delay().
+
+    Прямой вызов задачи выполняет её сразу, как обычную функцию.
+    """
+
+    def __init__(self, func, name, max_retries, retry_delay):
+        self.func = func
+        self.name = name
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.__doc__ = func.__doc__
+        self.__wrapped__ = func
+
+    def __repr__(self):
+        return f'<Task {self.name}>'
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def delay(self, *args, **kwargs):
+        """
+        Ставит задачу в очередь после фиксации текущей транзакции.
+
+        Аргументы должны сериализоваться в JSON. При TASKS_EAGER задача
+        выполняется сразу в вызывающем потоке.
+        """
+        if settings.TASKS_EAGER:
+            return self.func(*args, **kwargs)
+        transaction.on_commit(
+            lambda: get_broker().enqueue(self.name, args, kwargs))
+
+    def retry_in(self, attempts):
+        """Пауза перед следующей попыткой: растёт вдвое с каждой ошибкой."""
+        return self.retry_delay * 2 ** max(attempts - 1, 0)
+
+
+def task(func=None, *, name=None, max_retries=3, retry_delay=10):
+    """Декоратор, регистрирующий функцию как фоновую задачу."""
+    def decorator(func):
+        task_name = name or f'{func.__module__}.{func.__qualname__}'
+        REGISTRY[task_name] = Task(func, task_name, max_retries, retry_delay)
+        return REGISTRY[task_name]
+    return decorator(func) if func is not None else decorator
+
+
+def get_task(name):
+    if name not in REGISTRY:
+        # Модуль с задачей мог ещё не импортироваться в процессе воркера.
+        import_string(name)
+    return REGISTRY[name]
+
+
+@lru_cache(maxsize=None)
+def get_broker():
+    return import_string(settings.TASKS_BROKER)()
+
+
+def run_job(broker, job):
+    """Выполняет задачу из очереди; при ошибке повторяет или бросает её."""
+    try:
+        current = get_task(job.name)
+    except (ImportError, KeyError) as error:
+        logger.error('Неизвестная задача %s', job.name)
+        broker.fail(job, repr(error))
+        return False
+    args, kwargs = job.arguments()
+    try:
+        current.func(*args, **kwargs)
+    except Exception as error:
+        if job.attempts <= current.max_retries:
+            logger.warning('Задача %s упала, повтор: %r', job, error)
+            broker.retry(job, current.retry_in(job.attempts), repr(error))
+        else:
+            logger.exception('Задача %s не выполнена', job)
+            broker.fail(job, repr(error))
+        return False
+    broker.done(job)
+    return True
@@ -0,0 +1,144 @@
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .base import run_job
+
+
+class Broker:
+    """
+    Очередь задач.
+
+    enqueue() кладёт задачу в очередь; воркер получает задачи из
+    claim() и сообщает итог через done(), retry() или fail().
+    shared - видна ли очередь другим процессам, то есть run_workers.
+    """
+    shared = False
+
+    def enqueue(self, name, args, kwargs):
+        raise NotImplementedError
+
+    def claim(self, limit):
+        """Не больше limit готовых к выполнению задач."""
+        raise NotImplementedError
+
+    def done(self, job):
+        raise NotImplementedError
+
+    def retry(self, job, delay, error):
+        raise NotImplementedError
+
+    def fail(self, job, error):
+        raise NotImplementedError
+
+
+class DatabaseBroker(Broker):
+    """
+    Очередь в таблице tasks_job для воркеров manage.py run_workers.
+
+    Взятая задача занята lease секунд: если воркер умер, не закончив
+    её, задачу возьмёт другой.
+    """
+    shared = True
+    lease = 300
+
+    def enqueue(self, name, args, kwargs):
+        from .models import Job
+        payload = json.dumps({'args': list(args), 'kwargs': kwargs})
+        return Job.objects.create(name=name, payload=payload)
+
+    def claim(self, limit):
+        from .models import Job
+        now = timezone.now()
+        ready = Job.objects.filter(dead=False, run_at__lte=now).filter(
+            Q(locked_until__isnull=True) | Q(locked_until__lt=now))
+        claimed = []
+        for job in ready[:limit]:
+            # Условное обновление: из двух воркеров задачу получит один.
+            taken = Job.objects.filter(
+                pk=job.pk, locked_until=job.locked_until).update(
+                locked_until=now + timedelta(seconds=self.lease),
+                attempts=F('attempts') + 1)
+            if taken:
+                job.attempts += 1
+                claimed.append(job)
+        return claimed
+
+    def done(self, job):
+        job.delete()
+
+    def retry(self, job, delay, error):
+        type(job).objects.filter(pk=job.pk).update(
+            run_at=timezone.now() + timedelta(seconds=delay),
+            locked_until=None, last_error=error)
+
+    def fail(self, job, error):
+        type(job).objects.filter(pk=job.pk).update(
+            dead=True, locked_until=None, last_error=error)
+
+
+class MemoryJob:
+    def __init__(self, name, args, kwargs):
+        self.name = name
+        self.args = list(args)
+        self.kwargs = kwargs
+        self.attempts = 0
+        self.last_error = ''
+
+    def __str__(self):
+        return self.name
+
+    def arguments(self):
+        return self.args, self.kwargs
+
+
+class MemoryBroker(Broker):
+    """
+    Очередь в памяти процесса: задачи выполняет его же пул из
+    TASKS_WORKERS потоков, run_workers не нужен. Задачи теряются
+    при перезапуске процесса.
+    """
+
+    def __init__(self):
+        self.executor = ThreadPoolExecutor(
+            max_workers=settings.TASKS_WORKERS,
+            thread_name_prefix='tasks')
+        self.failed = []
+
+    def enqueue(self, name, args, kwargs):
+        job = MemoryJob(name, args, kwargs)
+        self.submit(job)
+        return job
+
+    def submit(self, job):
+        self.executor.submit(self.run, job)
+
+    def run(self, job):
+        job.attempts += 1
+        close_old_connections()
+        try:
+            run_job(self, job)
+        finally:
+            close_old_connections()
+
+    def claim(self, limit):
+        return []
+
+    def done(self, job):
+        pass
+
+    def retry(self, job, delay, error):
+        job.last_error = error
+        timer = threading.Timer(delay, self.submit, (job,))
+        timer.daemon = True
+        timer.start()
+
+    def fail(self, job, error):
+        job.last_error = error
+        self.failed.append(job)
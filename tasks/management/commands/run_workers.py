@@ -0,0 +1,52 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from tasks.base import get_broker, run_job
+
+
+def _run(broker, job):
+    close_old_connections()
+    try:
+        return run_job(broker, job)
+    finally:
+        close_old_connections()
+
+
+class Command(BaseCommand):
+    help = ('Выполняет фоновые задачи из очереди в пуле потоков. '
+            'С --once выходит, когда готовых задач не осталось.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=4)
+        parser.add_argument('--poll', type=float, default=1.0,
+                            help='Пауза в секундах, когда очередь пуста.')
+        parser.add_argument('--once', action='store_true')
+
+    def handle(self, *args, **options):
+        broker = get_broker()
+        if not broker.shared:
+            raise CommandError(
+                f'{type(broker).__name__} не хранит задачи между '
+                'процессами; укажите TASKS_BROKER=tasks.brokers.'
+                'DatabaseBroker.')
+        threads = options['threads']
+        done = failed = 0
+        with ThreadPoolExecutor(max_workers=threads,
+                                thread_name_prefix='tasks') as pool:
+            # Один поток - задачи выполняются прямо в основном.
+            run_map = map if threads == 1 else pool.map
+            while True:
+                jobs = broker.claim(threads)
+                if not jobs:
+                    if options['once']:
+                        break
+                    time.sleep(options['poll'])
+                    continue
+                for ok in run_map(lambda job: _run(broker, job), jobs):
+                    done += ok
+                    failed += not ok
+        self.stdout.write(self.style.SUCCESS(
+            f'Выполнено задач: {done}, с ошибкой: {failed}'))
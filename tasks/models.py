@@ -0,0 +1,54 @@
+import json
+
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """Задача в очереди DatabaseBroker; выполненные задачи удаляются."""
+    name = models.CharField(
+        verbose_name='Задача',
+        max_length=200,
+    )
+    payload = models.TextField(
+        verbose_name='Аргументы',
+        help_text='JSON: {"args": [...], "kwargs": {...}}',
+    )
+    attempts = models.PositiveIntegerField(
+        verbose_name='Попыток',
+        default=0,
+    )
+    run_at = models.DateTimeField(
+        verbose_name='Выполнить не раньше',
+        default=timezone.now,
+    )
+    locked_until = models.DateTimeField(
+        verbose_name='Занята до',
+        null=True,
+        blank=True,
+    )
+    dead = models.BooleanField(
+        verbose_name='Попытки исчерпаны',
+        default=False,
+    )
+    last_error = models.TextField(
+        verbose_name='Последняя ошибка',
+        blank=True,
+    )
+    created = models.DateTimeField(
+        verbose_name='Создана',
+        auto_now_add=True,
+    )
+
+    class Meta:
+        ordering = ('run_at', 'id')
+        indexes = (
+            models.Index(fields=('dead', 'run_at'), name='job_queue_idx'),
+        )
+
+    def __str__(self):
+        return f'{self.name} #{self.pk}'
+
+    def arguments(self):
+        payload = json.loads(self.payload)
+        return payload['args'], payload['kwargs']
@@ -0,0 +1,91 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import transaction
+from django.test import TransactionTestCase, override_settings
+from django.utils import timezone
+
+from tasks import task
+from tasks.base import get_broker
+from tasks.models import Job
+
+
+CALLS = []
+
+
+@task
+def remember(value):
+    CALLS.append(value)
+
+
+@task(max_retries=1, retry_delay=60)
+def explode():
+    raise ValueError('сбой')
+
+
+def run_workers():
+    call_command('run_workers', once=True, threads=1, stdout=StringIO())
+
+
+@override_settings(TASKS_EAGER=False,
+                   TASKS_BROKER='tasks.brokers.DatabaseBroker')
+class DatabaseBrokerTests(TransactionTestCase):
+    def setUp(self):
+        CALLS.clear()
+        get_broker.cache_clear()
+
+    def test_worker_runs_queued_task(self):
+        """run_workers выполняет задачу из очереди и удаляет её."""
+        get_broker().enqueue(remember.name, ['готово'], {})
+        run_workers()
+        self.assertEqual(CALLS, ['готово'])
+        self.assertFalse(Job.objects.exists())
+
+    def test_failed_task_is_retried_then_dead(self):
+        """Упавшая задача откладывается, а после max_retries - бросается."""
+        get_broker().enqueue(explode.name, [], {})
+        with self.assertLogs('tasks', 'WARNING'):
+            run_workers()
+        job = Job.objects.get()
+        self.assertEqual(job.attempts, 1)
+        self.assertFalse(job.dead)
+        self.assertGreater(job.run_at, timezone.now())
+        Job.objects.update(run_at=timezone.now())
+        with self.assertLogs('tasks', 'ERROR'):
+            run_workers()
+        job.refresh_from_db()
+        self.assertTrue(job.dead)
+        self.assertIn('сбой', job.last_error)
+
+    @override_settings(TASKS_BROKER='tasks.brokers.MemoryBroker')
+    def test_memory_broker_has_no_workers(self):
+        """Очередь в памяти нельзя разобрать из другого процесса."""
+        get_broker.cache_clear()
+        with self.assertRaises(CommandError):
+            run_workers()
+
+
+@override_settings(TASKS_EAGER=False,
+                   TASKS_BROKER='tasks.brokers.DatabaseBroker')
+class DelayTests(TransactionTestCase):
+    def setUp(self):
+        CALLS.clear()
+        get_broker.cache_clear()
+
+    def test_task_is_queued_after_commit(self):
+        """delay() ставит задачу в очередь только после фиксации."""
+        with transaction.atomic():
+            remember.delay('после фиксации')
+            self.assertFalse(Job.objects.exists())
+        self.assertEqual(Job.objects.get().arguments(),
+                         (['после фиксации'], {}))
+        self.assertEqual(CALLS, [])
+
+    @override_settings(TASKS_EAGER=True)
+    def test_eager_mode_runs_at_once(self):
+        """При TASKS_EAGER задача выполняется сразу."""
+        with transaction.atomic():
+            remember.delay('сразу')
+            self.assertEqual(CALLS, ['сразу'])
+        self.assertFalse(Job.objects.exists())
@@ -0,0 +1,26 @@
+import os
+
+import pytest
+
+from yatube.query_snapshot import (
+    QueryRecorder, Snapshot, failure_message)
+
+
+SNAPSHOT = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), 'queries.json')
+
+
+@pytest.fixture(scope='session')
+def query_snapshot():
+    snapshot = Snapshot(SNAPSHOT)
+    yield snapshot
+    snapshot.save()
+
+
+@pytest.fixture(autouse=True)
+def query_budget(request, query_snapshot):
+    with QueryRecorder() as recorder:
+        yield recorder
+    problems = query_snapshot.check(request.node.nodeid, recorder.summary())
+    if problems:
+        pytest.fail(failure_message(problems), pytrace=False)
@@ -82,8 +82,8 @@ class TestPost:
 
         admin_model = admin_site._registry[Post]
 
-        assert 'text' in admin_model.list_display, \
-            'Добавьте `text` для отображения в списке модели административного сайта'
+        assert 'short_text' in admin_model.list_display, \
+            'Добавьте сокращённый `text` для отображения в списке модели административного сайта'
         assert 'pub_date' in admin_model.list_display, \
             'Добавьте `pub_date` для отображения в списке модели административного сайта'
         assert 'author' in admin_model.list_display, \
@@ -1,7 +1,200 @@
+"""
+ASGI-вход для yatube.
+
+В Django 2.2 нет ни ASGI-обработчика, ни асинхронных представлений,
+поэтому WsgiToAsgi запускает обычное WSGI-приложение в пуле из
+ASGI_THREADS потоков: цикл событий сервера не блокируется, а одновременных
+обращений к базе не больше размера пула. Каждый запрос целиком, вместе
+с отдачей тела и закрытием ответа, идёт в одном потоке - соединения
+с базой в Django привязаны к потоку. Если клиент отключился или сервер
+отменил запрос, поток перестаёт отдавать тело, закрывает ответ
+и возвращается в пул.
+"""
+import asyncio
+import io
 import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+from django.conf import settings
+from django.core.wsgi import get_wsgi_application
+from django.db import connections
+
+
+# Сколько кусков тела ответа может ждать отправки клиенту.
+BODY_BUFFER = 8
+# Как часто поток, ждущий места в очереди, проверяет, не ушёл ли клиент, с.
+PUT_POLL = 0.1
+
+
+class ClientDisconnected(Exception):
+    """Ответ больше некому отдавать."""
+
+
+class WsgiToAsgi:
+    """ASGI 3 приложение поверх WSGI-приложения и пула потоков."""
+
+    def __init__(self, wsgi_application, max_workers):
+        self.wsgi_application = wsgi_application
+        self.max_workers = max_workers
+        self.executor = ThreadPoolExecutor(max_workers,
+                                           thread_name_prefix='asgi')
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+        if scope['type'] != 'http':
+            raise ValueError(f"Неподдерживаемый тип: {scope['type']}")
+        body = io.BytesIO()
+        while True:
+            message = await receive()
+            body.write(message.get('body', b''))
+            if not message.get('more_body'):
+                break
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(BODY_BUFFER)
+        closed = threading.Event()
+        future = loop.run_in_executor(self.executor, self.run,
+                                      environ(scope, body), loop, queue,
+                                      closed)
+        started = False
+        try:
+            while True:
+                item = await queue.get()
+                if item is None:
+                    break
+                if item[0] == 'start':
+                    started = True
+                    await send({'type': 'http.response.start',
+                                'status': item[1], 'headers': item[2]})
+                else:
+                    await send({'type': 'http.response.body',
+                                'body': item[1], 'more_body': True})
+        except BaseException:
+            # send упал на отключившемся клиенте или сервер отменил задачу:
+            # очередь больше никто не читает.
+            closed.set()
+            raise
+        try:
+            await future
+        finally:
+            if not started:
+                await send({'type': 'http.response.start', 'status': 500,
+                            'headers': []})
+            await send({'type': 'http.response.body', 'body': b''})
+
+    def run(self, environ, loop, queue, closed):
+        """
+        Выполняет запрос в потоке пула и передаёт ответ в очередь.
+
+        Когда closed установлен, отдача тела прекращается, но ответ всё
+        равно закрывается: Django освобождает соединения в close().
+        """
+        def put(item):
+            if closed.is_set():
+                raise ClientDisconnected
+            future = asyncio.run_coroutine_threadsafe(queue.put(item), loop)
+            while True:
+                try:
+                    return future.result(PUT_POLL)
+                except TimeoutError:
+                    if closed.is_set():
+                        future.cancel()
+                        raise ClientDisconnected
+
+        def start_response(status, headers, exc_info=None):
+            try:
+                put(('start', int(status.split()[0]),
+                     [(name.lower().encode('latin-1'),
+                       value.encode('latin-1'))
+                      for name, value in headers]))
+            except ClientDisconnected:
+                pass
+
+        try:
+            try:
+                result = self.wsgi_application(environ, start_response)
+                try:
+                    for chunk in result:
+                        if chunk:
+                            put(('body', chunk))
+                finally:
+                    if hasattr(result, 'close'):
+                        result.close()
+            finally:
+                put(None)
+        except ClientDisconnected:
+            pass
+
+    def close(self):
+        """Закрывает соединения с базой в каждом потоке пула и сам пул."""
+        # Пока все задачи ждут у барьера, каждая занимает свой поток.
+        barrier = threading.Barrier(self.max_workers)
+
+        def close_connections():
+            barrier.wait()
+            connections.close_all()
+
+        for _ in range(self.max_workers):
+            self.executor.submit(close_connections)
+        self.executor.shutdown(wait=True)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await asyncio.get_running_loop().run_in_executor(
+                    None, self.close)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+
+def environ(scope, body):
+    """
+    WSGI-окружение запроса по ASGI scope.
+
+    Тело уже прочитано целиком, поэтому CONTENT_LENGTH известен даже
+    для запросов без этого заголовка: без него Django не читает тело.
+    """
+    server = scope.get('server') or ('localhost', 80)
+    result = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode().decode('latin-1'),
+        'PATH_INFO': scope['path'].encode().decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': body,
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    if scope.get('client'):
+        result['REMOTE_ADDR'] = scope['client'][0]
+    for name, value in scope.get('headers', ()):
+        name = name.decode('latin-1').upper().replace('-', '_')
+        if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            name = f'HTTP_{name}'
+        value = value.decode('latin-1')
+        if name in result:
+            value = f'{result[name]},{value}'
+        result[name] = value
+    result.setdefault('CONTENT_LENGTH', str(body.tell()))
+    body.seek(0)
+    return result
 
-from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
 
-application = get_asgi_application()
+application = WsgiToAsgi(get_wsgi_application(), settings.ASGI_THREADS)
+
+if settings.TEMPLATE_WARMUP:
+    from yatube.template_warmup import ensure_templates
+    ensure_templates()
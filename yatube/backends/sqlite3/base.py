@@ -0,0 +1,29 @@
+"""
+SQLite для нескольких потоков и процессов сайта.
+
+При каждом подключении выполняются PRAGMA из OPTIONS['pragmas']: WAL,
+synchronous, busy_timeout, mmap_size. Транзакции начинаются в режиме
+OPTIONS['transaction_mode'] (IMMEDIATE): atomic() сразу захватывает
+запись и ждёт её до busy_timeout. Отложенная транзакция, успевшая
+прочитать, при первой записи не ждёт, а падает с "database is locked".
+"""
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        params.pop('pragmas', None)
+        params.pop('transaction_mode', None)
+        return params
+
+    def get_new_connection(self, conn_params):
+        connection = super().get_new_connection(conn_params)
+        pragmas = self.settings_dict['OPTIONS'].get('pragmas', {})
+        for name, value in pragmas.items():
+            connection.execute(f'PRAGMA {name} = {value}')
+        return connection
+
+    def _start_transaction_under_autocommit(self):
+        mode = self.settings_dict['OPTIONS'].get('transaction_mode', '')
+        self.cursor().execute(f'BEGIN {mode}'.strip())
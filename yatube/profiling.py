@@ -0,0 +1,189 @@
+"""
+Профилирование запросов: число SQL-запросов, время SQL, время отрисовки
+шаблонов и полное время ответа по имени URL.
+
+Замеряется доля PROFILING_SAMPLE_RATE запросов; при нуле middleware
+сразу передаёт запрос дальше. Статистика хранится в памяти процесса.
+"""
+import random
+import threading
+import time
+from bisect import bisect_right
+from collections import defaultdict, deque
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.db import connections
+from django.shortcuts import render
+from django.template.backends.django import DjangoTemplates, Template
+
+from posts.cache import stats as cache_stats
+
+
+METRICS = ('queries', 'sql', 'template', 'total')
+# Границы корзин гистограммы полного времени ответа, мс.
+BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+_local = threading.local()
+
+
+class Profile:
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.queries = 0
+        self.sql = 0.0
+        self.template = 0.0
+        self.total = 0.0
+
+    def record_query(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.sql += time.perf_counter() - start
+
+    def finish(self):
+        self.total = time.perf_counter() - self.start
+
+    def server_timing(self):
+        return ', '.join((
+            f'db;dur={self.sql * 1000:.1f};desc="SQL x{self.queries}"',
+            f'tpl;dur={self.template * 1000:.1f}',
+            f'total;dur={self.total * 1000:.1f}',
+        ))
+
+
+class Stats:
+    """
+    Последние PROFILING_WINDOW замеров каждого URL.
+
+    Хранятся только в памяти процесса: у каждого воркера своя статистика.
+    """
+
+    def __init__(self, window=None):
+        self.window = window
+        self.lock = threading.Lock()
+        self.samples = defaultdict(self._new_window)
+
+    def _new_window(self):
+        return deque(maxlen=self.window or settings.PROFILING_WINDOW)
+
+    def add(self, name, profile):
+        sample = (profile.queries, profile.sql * 1000,
+                  profile.template * 1000, profile.total * 1000)
+        with self.lock:
+            self.samples[name].append(sample)
+
+    def clear(self):
+        with self.lock:
+            self.samples.clear()
+
+    def summary(self):
+        """Число замеров, перцентили метрик и гистограмма по каждому URL."""
+        with self.lock:
+            samples = {name: list(rows) for name, rows in self.samples.items()}
+        result = []
+        for name, rows in sorted(samples.items()):
+            columns = dict(zip(METRICS, map(sorted, zip(*rows))))
+            histogram = [0] * (len(BUCKETS) + 1)
+            for total in columns['total']:
+                histogram[bisect_right(BUCKETS, total)] += 1
+            result.append({
+                'name': name,
+                'count': len(rows),
+                'metrics': {
+                    metric: {
+                        'p50': percentile(values, 50),
+                        'p95': percentile(values, 95),
+                        'max': values[-1],
+                    }
+                    for metric, values in columns.items()
+                },
+                'histogram': histogram,
+            })
+        return result
+
+
+def percentile(values, percent):
+    """Перцентиль по отсортированному списку, ближайший ранг."""
+    if not values:
+        return None
+    rank = max(int(round(percent / 100 * len(values) + 0.5)) - 1, 0)
+    return values[min(rank, len(values) - 1)]
+
+
+stats = Stats()
+
+
+def current_profile():
+    return getattr(_local, 'profile', None)
+
+
+class ProfilingMiddleware:
+    """Замеряет запрос и отдаёт замеры в заголовке Server-Timing."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        rate = settings.PROFILING_SAMPLE_RATE
+        if not rate or random.random() >= rate:
+            return self.get_response(request)
+        profile = _local.profile = Profile()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(profile.record_query))
+                response = self.get_response(request)
+        finally:
+            _local.profile = None
+        profile.finish()
+        match = request.resolver_match
+        stats.add(match.view_name if match else 'other', profile)
+        response['Server-Timing'] = profile.server_timing()
+        return response
+
+
+class ProfiledTemplate(Template):
+    """Шаблон, время отрисовки которого попадает в текущий замер."""
+
+    def render(self, context=None, request=None):
+        profile = current_profile()
+        if profile is None:
+            return super().render(context, request)
+        start = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            profile.template += time.perf_counter() - start
+
+
+class ProfiledDjangoTemplates(DjangoTemplates):
+    """
+    DjangoTemplates с замером отрисовки.
+
+    Замеряется только внешний шаблон: include и extends считаются
+    в его времени. Запросы, выполненные при отрисовке, входят и в SQL,
+    и во время шаблона.
+    """
+
+    def from_string(self, template_code):
+        return ProfiledTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return ProfiledTemplate(template.template, self)
+
+
+@staff_member_required
+def stats_view(request):
+    context = {
+        'rows': stats.summary(),
+        'buckets': BUCKETS,
+        'sample_rate': settings.PROFILING_SAMPLE_RATE,
+        'cache_rows': cache_stats.summary(),
+    }
+    return render(request, 'profiling.html', context)
@@ -0,0 +1,180 @@
+"""
+Снимки SQL-запросов страниц в тестах.
+
+Пока идёт тест, запросы каждого обращения тестового клиента записываются
+под методом и именем URL. В снимке для каждого теста и URL хранятся
+наибольшее число запросов за обращение и нормализованный SQL. Тест
+падает, если запросов стало больше или в одном обращении появился новый
+повторяющийся запрос (признак N+1), а также если теста или URL нет
+в снимке. Снимок пишется только с QUERY_SNAPSHOT_UPDATE=1.
+"""
+import json
+import os
+import re
+from collections import Counter, defaultdict
+from contextlib import ExitStack
+
+from django.core.signals import request_finished, request_started
+from django.db import connections
+from django.urls import Resolver404, resolve
+
+
+UPDATE = 'QUERY_SNAPSHOT_UPDATE'
+
+_NORMALIZE = (
+    (re.compile(r"'(?:[^']|'')*'"), '?'),
+    # Имена точек сохранения TestCase меняются от запуска к запуску.
+    (re.compile(r'"s\d+_x\d+"'), '"s?"'),
+    (re.compile(r'%s|\b\d+(?:\.\d+)?\b'), '?'),
+    (re.compile(r'\((?:\?, )*\?\)'), '(...)'),
+    (re.compile(r'\(\.\.\.\)(?:, \(\.\.\.\))+'), '(...)'),
+    (re.compile(r'\s+'), ' '),
+)
+
+
+def normalize(sql):
+    """SQL без значений: одинаковые по форме запросы совпадают."""
+    for pattern, replacement in _NORMALIZE:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip()
+
+
+class QueryRecorder:
+    """Запросы, выполненные при обращениях тестового клиента, по URL."""
+
+    def __init__(self):
+        self.requests = []
+        self._current = None
+        self._stack = ExitStack()
+
+    def __enter__(self):
+        for connection in connections.all():
+            self._stack.enter_context(
+                connection.execute_wrapper(self._record))
+        request_started.connect(self._started)
+        request_finished.connect(self._finished)
+        return self
+
+    def __exit__(self, *exc_info):
+        request_started.disconnect(self._started)
+        request_finished.disconnect(self._finished)
+        self._stack.close()
+
+    def _started(self, sender, environ=None, **kwargs):
+        try:
+            name = resolve(environ['PATH_INFO']).view_name
+        except Resolver404:
+            name = 'other'
+        self._current = []
+        self.requests.append(
+            (f"{environ['REQUEST_METHOD']} {name}", self._current))
+
+    def _finished(self, sender, **kwargs):
+        self._current = None
+
+    def _record(self, execute, sql, params, many, context):
+        if self._current is not None:
+            self._current.append(normalize(sql))
+        return execute(sql, params, many, context)
+
+    def summary(self):
+        """Для каждого URL: наибольшее число запросов, SQL и повторы."""
+        result = defaultdict(
+            lambda: {'count': 0, 'sql': set(), 'duplicates': set()})
+        for name, queries in self.requests:
+            entry = result[name]
+            entry['count'] = max(entry['count'], len(queries))
+            entry['sql'].update(queries)
+            entry['duplicates'].update(
+                sql for sql, count in Counter(queries).items() if count > 1)
+        return {
+            name: {key: sorted(value) if isinstance(value, set) else value
+                   for key, value in entry.items()}
+            for name, entry in result.items()
+        }
+
+
+class Snapshot:
+    """JSON-файл снимка: {тест: {URL: {count, sql, duplicates}}}."""
+
+    def __init__(self, path, update=None):
+        self.path = path
+        self.update = (bool(os.environ.get(UPDATE)) if update is None
+                       else update)
+        self.changed = False
+        try:
+            with open(path, encoding='utf-8') as file:
+                self.data = json.load(file)
+        except FileNotFoundError:
+            self.data = {}
+
+    def check(self, test_id, summary):
+        """Список нарушений теста; с update снимок теста переписывается."""
+        if not summary:
+            return []
+        stored = self.data.get(test_id, {})
+        if self.update:
+            if summary != stored:
+                self.data[test_id] = summary
+                self.changed = True
+            return []
+        problems = []
+        for name, entry in sorted(summary.items()):
+            base = stored.get(name)
+            if base is None:
+                problems.append(
+                    f'{name}: нет в снимке, перезапустите с {UPDATE}=1')
+                continue
+            if entry['count'] > base['count']:
+                problems.append(f"{name}: запросов {entry['count']}, "
+                                f"было {base['count']}")
+            problems.extend(
+                f'{name}: новый повторяющийся запрос {sql}'
+                for sql in entry['duplicates']
+                if sql not in base['duplicates'])
+        return problems
+
+    def save(self):
+        if not self.changed:
+            return
+        with open(self.path, 'w', encoding='utf-8') as file:
+            json.dump(self.data, file, ensure_ascii=False, indent=2,
+                      sort_keys=True)
+            file.write('\n')
+        self.changed = False
+
+
+def failure_message(problems):
+    return ('Запросы к базе не совпадают со снимком '
+            f'(обновить: {UPDATE}=1):\n' + '\n'.join(problems))
+
+
+class QuerySnapshotMixin:
+    """
+    Примесь к TestCase: сверяет запросы страниц в каждом тесте со снимком.
+
+    Путь к файлу снимка задаётся атрибутом query_snapshot.
+    """
+
+    query_snapshot = None
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls._snapshot = Snapshot(cls.query_snapshot)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls._snapshot.save()
+        super().tearDownClass()
+
+    def setUp(self):
+        super().setUp()
+        recorder = QueryRecorder().__enter__()
+        self.addCleanup(self._check_queries, recorder)
+
+    def _check_queries(self, recorder):
+        recorder.__exit__(None, None, None)
+        problems = self._snapshot.check(self.id(), recorder.summary())
+        if problems:
+            self.fail(failure_message(problems))
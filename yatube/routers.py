@@ -0,0 +1,104 @@
+"""
+Чтение с реплик, запись - в основную базу.
+
+Реплики - алиасы из DATABASE_REPLICAS. С них читают только безопасные
+запросы (GET, HEAD, OPTIONS), которые пропустил ReplicaMiddleware; всё
+остальное - формы, админка, фоновые задачи, команды - работает с основной
+базой. После записи пользователь ещё REPLICA_PIN_SECONDS читает из
+основной базы (кука PIN_COOKIE), чтобы видеть свои изменения, пока они
+не дошли до реплик.
+"""
+import random
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+PIN_COOKIE = 'pin_primary'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_state = threading.local()
+
+
+def reading_replicas():
+    return getattr(_state, 'replicas', False)
+
+
+@contextmanager
+def use_primary():
+    """Чтения внутри блока идут в основную базу."""
+    previous = reading_replicas()
+    _state.replicas = False
+    try:
+        yield
+    finally:
+        _state.replicas = previous
+
+
+def _database(alias):
+    config = connections[alias].settings_dict
+    return config['HOST'], config['PORT'], config['NAME']
+
+
+def replicas():
+    """
+    Реплики, отличные от основной базы.
+
+    В тестах реплика - зеркало тестовой базы (TEST['MIRROR']): это та же
+    база через другое соединение, которое не видит данных незавершённой
+    транзакции теста.
+    """
+    primary = _database(DEFAULT_DB_ALIAS)
+    return [alias for alias in settings.DATABASE_REPLICAS
+            if _database(alias) != primary]
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if reading_replicas():
+            aliases = replicas()
+            if aliases:
+                return random.choice(aliases)
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        # После записи и остаток запроса читает из основной базы.
+        _state.replicas = False
+        _state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, **hints):
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
+
+
+class ReplicaMiddleware:
+    """Решает, может ли запрос читать с реплик, и ставит куку после записи."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        _state.replicas = (request.method in SAFE_METHODS
+                           and PIN_COOKIE not in request.COOKIES)
+        _state.wrote = False
+        try:
+            response = self.get_response(request)
+            wrote = _state.wrote
+        finally:
+            _state.replicas = False
+            _state.wrote = False
+        if wrote and replicas():
+            response.set_cookie(PIN_COOKIE, '1',
+                                max_age=settings.REPLICA_PIN_SECONDS,
+                                httponly=True, samesite='Lax')
+        return response
@@ -0,0 +1,3 @@
+# По умолчанию - настройки разработки; в продакшене
+# DJANGO_SETTINGS_MODULE=yatube.settings.prod.
+from .dev import *  # noqa: F401,F403
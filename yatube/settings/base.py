@@ -0,0 +1,220 @@
+import os
+
+BASE_DIR = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+SECRET_KEY = 'n)qhpxt*n5)ouy05lep_wagg==8tyj6q4#wa_xob)@cpvutj_u'
+EMAIL_BACKEND = "django.core.mail.backends.filebased.EmailBackend"
+EMAIL_FILE_PATH = os.path.join(BASE_DIR, "sent_emails")
+
+LOGIN_URL = "/auth/login/"
+LOGIN_REDIRECT_URL = "index"
+LOGOUT_REDIRECT_URL = "index"
+
+ALLOWED_HOSTS = [
+    "localhost",
+    "127.0.0.1",
+    "[::1]",
+    "testserver",
+]
+
+INSTALLED_APPS = [
+    'about',
+    'users',
+    'posts.apps.PostsConfig',
+    'tasks.apps.TasksConfig',
+    'django.contrib.admin',
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+]
+
+MIDDLEWARE = [
+    'yatube.profiling.ProfilingMiddleware',
+    'yatube.routers.ReplicaMiddleware',
+    'django.middleware.security.SecurityMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+]
+
+ROOT_URLCONF = 'yatube.urls'
+
+TEMPLATES_DIR = os.path.join(BASE_DIR, "templates")
+TEMPLATES = [
+    {
+        'BACKEND': 'yatube.profiling.ProfiledDjangoTemplates',
+        'DIRS': [TEMPLATES_DIR],
+        'APP_DIRS': True,
+        'OPTIONS': {
+            'context_processors': [
+                'django.template.context_processors.debug',
+                'django.template.context_processors.request',
+                'django.contrib.auth.context_processors.auth',
+                'django.contrib.messages.context_processors.messages',
+            ],
+        },
+    },
+]
+
+WSGI_APPLICATION = 'yatube.wsgi.application'
+
+# База данных из окружения. Соединение переживает запрос и живёт до
+# DATABASE_CONN_MAX_AGE секунд: у каждого потока сервера (и пула
+# ASGI_THREADS) оно своё, так что потоки и есть пул соединений.
+DATABASE_ENGINES = {
+    'sqlite': 'yatube.backends.sqlite3',
+    'postgresql': 'django.db.backends.postgresql',
+    'mysql': 'django.db.backends.mysql',
+}
+DATABASE_ENGINE = os.environ.get('DATABASE_ENGINE', 'sqlite')
+# SQLite: WAL - читатели не ждут писателя; NORMAL - fsync только при
+# контрольной точке WAL; писатели ждут друг друга до SQLITE_BUSY_TIMEOUT мс.
+SQLITE_OPTIONS = {
+    'transaction_mode': os.environ.get('SQLITE_TRANSACTION_MODE',
+                                       'IMMEDIATE'),
+    'pragmas': {
+        'journal_mode': os.environ.get('SQLITE_JOURNAL_MODE', 'WAL'),
+        'synchronous': os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL'),
+        'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT', 5000)),
+        'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 2 ** 20)),
+    },
+}
+DATABASES = {
+    'default': {
+        'ENGINE': DATABASE_ENGINES[DATABASE_ENGINE],
+        'NAME': os.environ.get(
+            'DATABASE_NAME',
+            os.path.join(BASE_DIR, 'db.sqlite3')
+            if DATABASE_ENGINE == 'sqlite' else 'yatube',
+        ),
+        'USER': os.environ.get('DATABASE_USER', ''),
+        'PASSWORD': os.environ.get('DATABASE_PASSWORD', ''),
+        'HOST': os.environ.get('DATABASE_HOST', ''),
+        'PORT': os.environ.get('DATABASE_PORT', ''),
+        'CONN_MAX_AGE': int(os.environ.get('DATABASE_CONN_MAX_AGE', 60)),
+        'OPTIONS': SQLITE_OPTIONS if DATABASE_ENGINE == 'sqlite' else {},
+        # Тестовая SQLite - файл, как в работе: в памяти нет ни WAL,
+        # ни блокировок между соединениями.
+        'TEST': {
+            'NAME': os.environ.get(
+                'DATABASE_TEST_NAME',
+                os.path.join(BASE_DIR, 'test_db.sqlite3')
+                if DATABASE_ENGINE == 'sqlite' else None,
+            ),
+        },
+    }
+}
+
+# Реплика для чтения: DATABASE_REPLICA - файл SQLite или хост сервера
+# с теми же настройками, что у основной базы. GET-запросы читают с неё,
+# но после записи пользователь REPLICA_PIN_SECONDS читает из основной.
+DATABASE_ROUTERS = ['yatube.routers.ReplicaRouter']
+DATABASE_REPLICAS = []
+if os.environ.get('DATABASE_REPLICA'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME' if DATABASE_ENGINE == 'sqlite' else 'HOST':
+            os.environ['DATABASE_REPLICA'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append('replica')
+REPLICA_PIN_SECONDS = int(os.environ.get('REPLICA_PIN_SECONDS', 10))
+
+CACHE_BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'memcached': 'django.core.cache.backends.memcached.MemcachedCache',
+    'redis': 'django_redis.cache.RedisCache',
+}
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'locmem')
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKENDS[CACHE_BACKEND],
+        'LOCATION': os.environ.get(
+            'CACHE_LOCATION',
+            os.path.join(BASE_DIR, 'cache') if CACHE_BACKEND == 'file' else '',
+        ),
+        'TIMEOUT': int(os.environ.get('CACHE_TIMEOUT', 300)),
+    }
+}
+FEED_CACHE_TIMEOUT = int(os.environ.get('FEED_CACHE_TIMEOUT', 60 * 15))
+# Версии лент и авторы записей: дольше страниц, но не навсегда.
+FEED_VERSION_TIMEOUT = int(os.environ.get('FEED_VERSION_TIMEOUT',
+                                          60 * 60 * 24 * 30))
+POSTS_COUNT_TIMEOUT = int(os.environ.get('POSTS_COUNT_TIMEOUT', 60 * 10))
+
+# Записи авторов, у которых меньше FOLLOW_FANOUT_LIMIT подписчиков,
+# раскладываются по лентам подписок при публикации, остальные - при чтении.
+FOLLOW_FANOUT_LIMIT = int(os.environ.get('FOLLOW_FANOUT_LIMIT', 1000))
+# Сколько последних записей автора получает новый подписчик.
+FOLLOW_BACKFILL = int(os.environ.get('FOLLOW_BACKFILL', 100))
+
+# Доля запросов, для которых ProfilingMiddleware замеряет SQL и шаблоны;
+# статистика по PROFILING_WINDOW последним замерам каждого URL - на
+# странице /admin/profiling/.
+PROFILING_SAMPLE_RATE = float(os.environ.get('PROFILING_SAMPLE_RATE', 0))
+PROFILING_WINDOW = int(os.environ.get('PROFILING_WINDOW', 1000))
+
+# Миниатюры картинок записей вписываются в POST_THUMBNAIL_SIZE.
+POST_THUMBNAIL_SIZE = (960, 540)
+
+# Фоновые задачи: DatabaseBroker выполняют процессы manage.py run_workers,
+# tasks.brokers.MemoryBroker - пул из TASKS_WORKERS потоков в самом
+# процессе сайта. При TASKS_EAGER задачи выполняются сразу при вызове.
+TASKS_BROKER = os.environ.get('TASKS_BROKER',
+                              'tasks.brokers.DatabaseBroker')
+TASKS_WORKERS = int(os.environ.get('TASKS_WORKERS', 2))
+TASKS_EAGER = False
+
+# Размер пула потоков, в котором yatube.asgi выполняет запросы: столько
+# запросов одновременно обращаются к базе под ASGI-сервером.
+ASGI_THREADS = int(os.environ.get('ASGI_THREADS', 8))
+
+# Таблицу posts_post_fts миграция создаёт только в SQLite: остальным
+# базам и SQLite без FTS5 - posts.search.SimpleBackend.
+POSTS_SEARCH_BACKEND = os.environ.get(
+    'POSTS_SEARCH_BACKEND',
+    'posts.search.SQLiteFTSBackend' if DATABASE_ENGINE == 'sqlite'
+    else 'posts.search.SimpleBackend',
+)
+
+AUTH_PASSWORD_VALIDATORS = [
+    {
+        'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
+    },
+]
+
+LANGUAGE_CODE = 'ru'
+
+TIME_ZONE = 'UTC'
+
+USE_I18N = True
+
+USE_L10N = True
+
+USE_TZ = True
+
+STATIC_URL = '/static/'
+
+STATIC_ROOT = os.path.join(BASE_DIR, "static")
+
+MEDIA_URL = '/media/'
+
+MEDIA_ROOT = os.path.join(BASE_DIR, "media")
+
+# Прогревать и проверять все шаблоны при старте WSGI/ASGI-приложения.
+TEMPLATE_WARMUP = False
@@ -0,0 +1,6 @@
+from .base import *  # noqa: F401,F403
+
+DEBUG = True
+
+# Без воркеров: побочные эффекты записи выполняются прямо в запросе.
+TASKS_EAGER = True
@@ -0,0 +1,45 @@
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+from django.template import TemplateSyntaxError, engines
+from django.template.utils import get_app_template_dirs
+
+
+TEMPLATE_EXTENSIONS = ('.html', '.txt')
+
+
+def template_names(engine):
+    """Имена всех шаблонов из DIRS и каталогов templates приложений."""
+    dirs = list(engine.dirs) + list(get_app_template_dirs('templates'))
+    names = set()
+    for directory in dirs:
+        for root, _, files in os.walk(directory):
+            for filename in files:
+                if filename.endswith(TEMPLATE_EXTENSIONS):
+                    path = os.path.join(root, filename)
+                    names.add(os.path.relpath(path, directory))
+    return sorted(names)
+
+
+def warm_templates():
+    """
+    Компилирует все шаблоны; с кэширующим загрузчиком они остаются в памяти.
+
+    Возвращает словарь {имя шаблона: ошибка} для шаблонов с ошибками.
+    """
+    errors = {}
+    for engine in engines.all():
+        for name in template_names(engine.engine):
+            try:
+                engine.get_template(name)
+            except TemplateSyntaxError as error:
+                errors[name] = error
+    return errors
+
+
+def ensure_templates():
+    """Прогрев при старте приложения: с ошибкой в шаблоне оно не запустится."""
+    errors = warm_templates()
+    if errors:
+        raise ImproperlyConfigured(
+            'Шаблоны с ошибками: ' + ', '.join(sorted(errors)))